@@ -220,6 +220,13 @@ def storm_speed(cyclone):
 
 
 def initial_bearing(cyclone):
+    """
+    Add a 'Bearing' list to every storm, one bearing per fix: the bearing of
+    the segment leaving the fix, with the last fix repeating the bearing of
+    the segment arriving at it so the list lines up with 'LatLon'
+
+    :param cyclone: dictionary of storms by id, each with its 'Dates' and 'LatLon' lists
+    """
     for storm in cyclone:
         cyclone[storm]['Bearing'] = []
         for i in range(len(cyclone[storm]['Dates']) - 1):
@@ -231,6 +238,10 @@ def initial_bearing(cyclone):
                 cyclone[storm]['Bearing'].append(0)
             else:
                 cyclone[storm]['Bearing'].append(piecewise_start.bearingTo(piecewise_end))
+        if cyclone[storm]['Bearing']:
+            cyclone[storm]['Bearing'].append(cyclone[storm]['Bearing'][-1])
+        else:
+            cyclone[storm]['Bearing'].append(0)
 
 
 def max_extent(cyclone):
@@ -6,6 +6,7 @@ Jianzhang Chen, Yichong Guo, Chaohan Shang
 import datetime
 from pygeodesy import ellipsoidalVincenty as ev
 import re
+from storm_search import resolve_storm_id
 
 
 def read_one_HURDAT2_storm(file, storm_id=None) -> dict:
@@ -77,15 +78,16 @@ def get_max_wind_speed(storm: dict):
     :param storm: dictionary with all of one storm's data
     :return: maximum wind for the storm
     """
-    max_datetime = datetime
     highest = 0  # start at zero
+    max_row = None
     for r in storm['rows']:  # loop through the rows
         if r[6] > highest:  # update highest value found
             highest = r[6]
-            max_datetime = datetime.datetime.strptime(r[0]+r[1], '%Y%m%d%H%M')
-    if highest == 0:
-        max_datetime = 'Not Applicable'
-    return highest, max_datetime
+            max_row = r
+    if max_row is None:
+        return highest, 'Not Applicable'
+    # parse the time only once, for the first row at the highest wind:
+    return highest, datetime.datetime.strptime(max_row[0] + max_row[1], '%Y%m%d%H%M')
 
 
 def hours_elapsed(ts1: str, ts2: str) -> float:
@@ -218,6 +220,41 @@ def same_value_index(value_list: list):
     return index_list
 
 
+def max_wind_quadrants(row: list) -> list:
+    """Given a HURDAT2 data row, return the indices of the quadrants with the largest wind extent.
+    The 64 kt radii are used when they hold any information, then the 50 kt, then the 34 kt ones.
+    :param row: one data row of a storm
+    :return: the max quadrants' indices (0 NE, 1 SE, 2 SW, 3 NW), or [99] if no radii are known
+    """
+    if len(set(row[-4:])) != 1 or (len(set(row[-4:])) == 1 and set(row[-4:]) != {0} and set(row[-4:]) != {-999}):
+        return same_value_index(row[-4:])
+    elif len(set(row[-8:-4])) != 1 or (len(set(row[-8:-4])) == 1 and set(row[-8:-4]) != {0} and set(row[-8:-4]) != {-999}):
+        return same_value_index(row[-8:-4])
+    elif len(set(row[-12:-8])) != 1 or (len(set(row[-12:-8])) == 1 and set(row[-12:-8]) != {0} and set(row[-12:-8]) != {-999}):
+        return same_value_index(row[-12:-8])
+    else:
+        return [99]
+
+
+def is_accurate_direction(quadrants: list, degree: float) -> bool:
+    """Given the max wind quadrants of a fix and the storm's direction of movement,
+    return whether one of the quadrants lies 45-90 degrees clockwise of the movement.
+    :param quadrants: the max quadrants' indices, from max_wind_quadrants
+    :param degree: bearing of the storm's movement, in degrees
+    :return: True if the hypothesis holds for this fix
+    """
+    degree_low = degree + 45
+    degree_high = degree +90
+
+    degree_low = (degree_low-360) if degree_low > 360 else degree_low
+    degree_high = (degree_high - 360) if degree_high > 360 else degree_high
+
+    for j in quadrants:
+        if (j * 90 < degree_low < (j + 1) * 90) or (j * 90 < degree_high < (j + 1) * 90):
+            return True
+    return False
+
+
 def dir_accurate_case(storm: dict):
     """Given a HURDAT2 storm dictionary, return the number of valid cases and the number of accurate cases.
     :param storm: dictionary with all of one storm's data
@@ -230,32 +267,17 @@ def dir_accurate_case(storm: dict):
     case_num = 0
 
     for i in range(len(rows)-1):
-        if len(set(rows[i][-4:])) != 1 or (len(set(rows[i][-4:])) == 1 and set(rows[i][-4:]) != {0} and set(rows[i][-4:]) != {-999}):
-            case.append(same_value_index(rows[i][-4:]))
-        elif len(set(rows[i][-8:-4])) != 1 or (len(set(rows[i][-8:-4])) == 1 and set(rows[i][-8:-4]) != {0} and set(rows[i][-8:-4]) != {-999}):
-            case.append(same_value_index(rows[i][-8:-4]))
-        elif len(set(rows[i][-12:-8])) != 1 or (len(set(rows[i][-12:-8])) == 1 and set(rows[i][-12:-8]) != {0} and set(rows[i][-12:-8]) != {-999}):
-            case.append(same_value_index(rows[i][-12:-8]))
-        else:
-            case.append([99])
+        case.append(max_wind_quadrants(rows[i]))
 
         start = myLatLon(rows[i][4], rows[i][5])
         end = myLatLon(rows[i+1][4], rows[i+1][5])
 
         degree = start.bearingTo(end) if start != end else 0
 
-        degree_low = degree + 45
-        degree_high = degree +90
-
-        degree_low = (degree_low-360) if degree_low > 360 else degree_low
-        degree_high = (degree_high - 360) if degree_high > 360 else degree_high
-
         if case[i] != [99]:
             case_num += 1
-            for j in case[i]:
-                if (j * 90 < degree_low < (j + 1) * 90) or (j * 90 < degree_high < (j + 1) * 90):
-                    accurate_case += 1
-                    break
+            if is_accurate_direction(case[i], degree):
+                accurate_case += 1
 
     return accurate_case, case_num
 
@@ -317,10 +339,14 @@ def main():
     while True:
         function = input('Enter the function you want, s for checking by storm, y for checking by year: ')
         if function is 's':
-            storm_id = input("Type in the storm ID you want check or 'a' for all records: ")
+            storm_id = input("Type in the storm ID or name you want check or 'a' for all records: ")
 
             if storm_id == 'a':
                 storm_id = None
+            else:
+                storm_id, others = resolve_storm_id(filename, storm_id)
+                if others:
+                    print('Other matches:', ', '.join('{} {}'.format(s['id'], s['name']) for s in others))
             break
 
         elif function is 'y':
@@ -0,0 +1,276 @@
+"""
+Analog storm search: find the historical storms whose tracks are most similar
+to a given track. Every track is resampled to a fixed number of points and
+turned into a feature vector of position, heading and intensity. The
+vectors have 80 dimensions, too many for a k-d tree to prune anything, so
+the tree indexes a short summary of each track instead: the positions of a
+few of its resampled points. The candidates it gives are ranked by the full
+feature vectors, then re-ranked by dynamic time warping (or discrete
+Frechet distance) over the full tracks.
+"""
+
+import heapq
+import math
+from PhaseB_5 import read_one_HURDAT2_storm
+from hurdat_columns import new_columns, append_storm, add_motion_columns, read_HURDAT2_columns, storm_slices
+from track_geometry import gc_interpolate, gc_distance
+
+
+# feature scales: 10 kt of wind and a full turn of heading weigh about as much as 1 degree of position
+WIND_SCALE = 0.1
+HEADING_SCALE = 1.0
+
+# resampled points whose positions make up the summary the k-d tree indexes
+SUMMARY_POINTS = 4
+
+# half-width of the Sakoe-Chiba band of dtw_distance, in fixes
+DTW_WINDOW = 8
+
+
+def resample_track(columns: dict, start: int, end: int, points: int = 16) -> list:
+    """Given one storm of a columnar dataset, return its track at `points`
+    equally spaced times from the first to the last fix.
+    :param columns: columnar dataset
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param points: number of points to return
+    :return: list of (lat, lon, wind, heading), the heading being that of the segment the point lies on
+    """
+    hours = columns['hours']
+    lat = columns['lat']
+    lon = columns['lon']
+    wind = columns['wind']
+    heading = columns['heading']
+    first = hours[start]
+    duration = hours[end - 1] - first
+    track = []
+    i = start
+    for p in range(points):
+        t = first + duration * p / (points - 1) if points > 1 else first
+        while i + 1 < end - 1 and hours[i + 1] <= t:
+            i += 1
+        if i + 1 >= end or hours[i + 1] == hours[i]:
+            track.append((lat[i], lon[i], max(wind[i], 0), heading[i]))
+            continue
+        fraction = min(1.0, (t - hours[i]) / (hours[i + 1] - hours[i]))
+        la, lo = gc_interpolate(lat[i], lon[i], lat[i + 1], lon[i + 1], fraction)
+        track.append((la, lo, max(wind[i], 0) + (max(wind[i + 1], 0) - max(wind[i], 0)) * fraction, heading[i]))
+    return track
+
+
+def track_features(track: list) -> list:
+    """Given a resampled track, return its feature vector: for every point the
+    latitude, the longitude unwrapped across the dateline and scaled by the
+    cosine of the mean latitude, the heading of motion as sine and cosine,
+    and the wind.
+    :param track: list of (lat, lon, wind, heading) from resample_track
+    :return: list of floats
+    """
+    scale = math.cos(math.radians(sum(p[0] for p in track) / len(track)))
+    vector = []
+    previous = track[0][1]
+    for lat, lon, wind, heading in track:
+        # keep tracks that cross the 180th meridian continuous:
+        lon = previous + (lon - previous + 180.0) % 360.0 - 180.0
+        previous = lon
+        vector.extend([lat, lon * scale,
+                       HEADING_SCALE * math.sin(math.radians(heading)),
+                       HEADING_SCALE * math.cos(math.radians(heading)),
+                       WIND_SCALE * wind])
+    return vector
+
+
+def track_summary(vector: list, points: int = SUMMARY_POINTS) -> list:
+    """Given a feature vector from track_features, return its summary: the
+    latitude and scaled longitude of `points` evenly spaced track points."""
+    count = len(vector) // 5
+    summary = []
+    for p in range(points):
+        n = int(round(p * (count - 1) / (points - 1))) if points > 1 else 0
+        summary.extend(vector[5 * n:5 * n + 2])
+    return summary
+
+
+def build_kdtree(vectors: list, indices: list = None, depth: int = 0):
+    """Build a k-d tree over feature vectors, splitting on the median of the
+    dimensions in turn.
+    :param vectors: list of equal-length feature vectors
+    :param indices: Optional. Indices of the vectors to put in this subtree.
+    :param depth: depth of this subtree
+    :return: nested (index, axis, left, right) tuples, or None for an empty tree
+    """
+    if indices is None:
+        indices = list(range(len(vectors)))
+    if not indices:
+        return None
+    axis = depth % len(vectors[indices[0]])
+    indices.sort(key=lambda i: vectors[i][axis])
+    middle = len(indices) // 2
+    return (indices[middle], axis,
+            build_kdtree(vectors, indices[:middle], depth + 1),
+            build_kdtree(vectors, indices[middle + 1:], depth + 1))
+
+
+def kdtree_nearest(tree, vectors: list, query: list, k: int) -> list:
+    """Return the k vectors nearest to the query, skipping subtrees that
+    cannot beat the current k-th best distance.
+    :param tree: tree from build_kdtree
+    :param vectors: the vectors the tree was built over
+    :param query: feature vector to search for
+    :param k: number of neighbours
+    :return: list of (squared distance, vector index), nearest first
+    """
+    best = []  # max-heap of (-squared distance, index)
+
+    def visit(node):
+        if node is None:
+            return
+        index, axis, left, right = node
+        d = sum((a - b) ** 2 for a, b in zip(vectors[index], query))
+        if len(best) < k:
+            heapq.heappush(best, (-d, index))
+        elif d < -best[0][0]:
+            heapq.heapreplace(best, (-d, index))
+        diff = query[axis] - vectors[index][axis]
+        near, far = (left, right) if diff < 0 else (right, left)
+        visit(near)
+        if len(best) < k or diff * diff < -best[0][0]:
+            visit(far)
+
+    visit(tree)
+    return sorted((-d, i) for d, i in best)
+
+
+def _track_points(columns: dict, start: int, end: int) -> list:
+    """Return the (lat, lon) fixes of one storm."""
+    return list(zip(columns['lat'][start:end], columns['lon'][start:end]))
+
+
+def dtw_distance(a: list, b: list, window: int = DTW_WINDOW) -> float:
+    """Given two tracks of (lat, lon) points, return their dynamic time
+    warping distance: the smallest sum of point distances, in km, over the
+    monotonic alignments, divided by the alignment length. Alignments are
+    kept within a Sakoe-Chiba band around the diagonal of the two tracks, so
+    a comparison costs about len(a) * (2 * window + 1) point distances.
+    :param window: half-width of the band, in points of b; None aligns freely
+    """
+    inf = float('inf')
+    previous = [inf] * (len(b) + 1)
+    previous_steps = [0] * (len(b) + 1)
+    previous[0] = 0.0
+    slope = (len(b) - 1) / (len(a) - 1) if len(a) > 1 else 0.0
+    for i, p in enumerate(a):
+        current = [inf] * (len(b) + 1)
+        steps = [0] * (len(b) + 1)
+        if window is None:
+            low, high = 1, len(b)
+        else:
+            # a band narrower than the slope would break the path
+            width = max(window, int(math.ceil(slope)))
+            centre = int(round(i * slope)) + 1
+            low, high = max(1, centre - width), min(len(b), centre + width)
+        for j in range(low, high + 1):
+            cost = gc_distance(p[0], p[1], b[j - 1][0], b[j - 1][1]) / 1000.0
+            options = [(previous[j - 1], previous_steps[j - 1]), (previous[j], previous_steps[j]),
+                       (current[j - 1], steps[j - 1])]
+            total, count = min(options)
+            current[j] = total + cost
+            steps[j] = count + 1
+        previous = current
+        previous_steps = steps
+        previous[0] = inf
+    return previous[-1] / previous_steps[-1]
+
+
+def frechet_distance(a: list, b: list) -> float:
+    """Given two tracks of (lat, lon) points, return their discrete Frechet
+    distance in km: the shortest leash that lets both tracks be walked
+    forwards from start to end."""
+    inf = float('inf')
+    previous = [inf] * len(b)
+    for i, p in enumerate(a):
+        current = [inf] * len(b)
+        for j in range(len(b)):
+            cost = gc_distance(p[0], p[1], b[j][0], b[j][1]) / 1000.0
+            if i == 0 and j == 0:
+                reach = 0.0
+            elif i == 0:
+                reach = current[j - 1]
+            elif j == 0:
+                reach = previous[j]
+            else:
+                reach = min(previous[j - 1], previous[j], current[j - 1])
+            current[j] = max(reach, cost)
+        previous = current
+    return previous[-1]
+
+
+def build_analog_index(columns: dict, points: int = 16) -> dict:
+    """Given a columnar dataset, return an analog search index over its storms.
+    :param columns: columnar dataset, may hold both basins
+    :param points: number of resampled points per track
+    :return: dictionary with the dataset, the feature vectors, their summaries
+     and the k-d tree over the summaries
+    """
+    vectors = []
+    for k, start, end in storm_slices(columns):
+        vectors.append(track_features(resample_track(columns, start, end, points)))
+    summaries = [track_summary(vector) for vector in vectors]
+    return {'columns': columns, 'points': points, 'vectors': vectors, 'summaries': summaries,
+            'tree': build_kdtree(summaries)}
+
+
+def find_analogs(index: dict, storm: dict, k: int = 20, refine: str = 'dtw', candidates: int = 40) -> list:
+    """Given an analog index and a storm, return the most similar historical storms.
+    :param index: index from build_analog_index
+    :param storm: dictionary with one storm's data, as from read_one_HURDAT2_storm
+    :param k: number of analogs to return
+    :param refine: 'dtw', 'frechet' or None to rank by feature distance only
+    :param candidates: number of k-d tree candidates to rank by feature distance
+     and, with refine, to re-rank
+    :return: list of (distance, storm id), most similar first
+    """
+    query = new_columns()
+    append_storm(query, storm)
+    add_motion_columns(query)
+    track = resample_track(query, 0, query['offsets'][1], index['points'])
+    columns = index['columns']
+    vector = track_features(track)
+    found = kdtree_nearest(index['tree'], index['summaries'], track_summary(vector), max(k, candidates) + 1)
+    found = sorted((math.sqrt(sum((a - b) ** 2 for a, b in zip(index['vectors'][i], vector))), i)
+                   for d, i in found if columns['id'][i] != storm['id'])
+    if refine is None:
+        return [(d, columns['id'][i]) for d, i in found[:k]]
+
+    if refine == 'dtw':
+        measure = dtw_distance
+    elif refine == 'frechet':
+        measure = frechet_distance
+    else:
+        raise ValueError('Invalid or unsupported refinement {} given.'.format(refine))
+    points = _track_points(query, 0, query['offsets'][1])
+    offsets = columns['offsets']
+    ranked = sorted((measure(points, _track_points(columns, offsets[i], offsets[i + 1])), columns['id'][i])
+                    for d, i in found)
+    return ranked[:k]
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    index = build_analog_index(read_HURDAT2_columns(filename))
+    storm_id = input("Type in the storm ID you want analogs for: ")
+    with open(filename, 'r') as f:
+        s = read_one_HURDAT2_storm(f, storm_id)
+    if s is None:
+        print("Cannot find the storm.")
+        return
+    for distance, analog in find_analogs(index, s):
+        print(analog, '{:.1f} km'.format(distance))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Cross-basin continuity: systems that cross from the Atlantic into the east
+or central Pacific (or back) are renamed and get a new ATCF id, so the two
+archives hold them as unrelated storms. Crossovers are found by matching the
+last fix of a storm to the first fix of a storm of the other ocean that starts
+shortly afterwards and close by. Candidates come from a time-sorted index of
+storm starts, so each storm end only looks at the few storms that began in
+its time window, and the search stays near linear.
+"""
+
+import bisect
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from track_geometry import gc_distance, METERS_PER_NM
+from cyclone_energy import storm_energy
+from masked_columns import masked_max
+
+
+# ocean of every basin code; a crossover changes ocean, while an EP -> CP handoff does not
+OCEANS = {'AL': 'Atlantic', 'EP': 'Pacific', 'CP': 'Pacific'}
+
+
+def link_crossovers(columns: dict, max_gap: float = 24.0, max_overlap: float = 6.0,
+                    max_km: float = 500.0) -> list:
+    """Given a columnar dataset holding both basins, find the crossovers.
+    :param columns: columnar dataset, for example the Atlantic file read into the Pacific one
+    :param max_gap: longest time in hours from the end of a storm to the start of its continuation
+    :param max_overlap: longest time in hours a continuation may start before the end of the storm
+    :param max_km: largest distance between the two endpoints
+    :return: list of (storm index, continuation index, gap hours, gap km); each storm
+     has at most one continuation, the closest candidate in the other ocean
+    """
+    hours = columns['hours']
+    lat = columns['lat']
+    lon = columns['lon']
+    starts = sorted((hours[start], k) for k, start, end in storm_slices(columns) if end > start)
+    start_hours = [s[0] for s in starts]
+    offsets = columns['offsets']
+    ocean = [OCEANS.get(basin, basin) for basin in columns['basin']]
+
+    links = []
+    taken = set()
+    for k, start, end in storm_slices(columns):
+        if end == start:
+            continue
+        last = end - 1
+        first = bisect.bisect_left(start_hours, hours[last] - max_overlap)
+        best = None
+        for n in range(first, bisect.bisect_right(start_hours, hours[last] + max_gap)):
+            j = starts[n][1]
+            if j == k or j in taken or ocean[j] == ocean[k]:
+                continue
+            begin = offsets[j]
+            km = gc_distance(lat[last], lon[last], lat[begin], lon[begin]) / 1000.0
+            if km <= max_km and (best is None or km < best[3]):
+                best = (k, j, hours[begin] - hours[last], km)
+        if best is not None:
+            taken.add(best[1])
+            links.append(best)
+    return links
+
+
+def merged_storms(columns: dict, links: list) -> list:
+    """Given crossover links, chain them into logical storms and combine their metrics.
+    :param columns: columnar dataset
+    :param links: links from link_crossovers
+    :return: list of dictionaries with 'ids', 'names', 'rows' (storm indices in order),
+     'distance' (nm, including the gaps), 'hours', 'mean_speed' (kt), 'max_wind' and 'ace'
+    """
+    following = {k: (j, km) for k, j, gap, km in links}
+    continued = set(j for k, j, gap, km in links)
+    offsets = columns['offsets']
+    hours = columns['hours']
+    merged = []
+    for k in sorted(following):
+        if k in continued:
+            continue  # not the first storm of its chain
+        chain = [k]
+        distance = 0.0
+        while chain[-1] in following:
+            j, km = following[chain[-1]]
+            distance += km * 1000.0 / METERS_PER_NM
+            chain.append(j)
+        ace = 0.0
+        max_wind = -999
+        for j in chain:
+            distance += columns['distance'][offsets[j + 1] - 1]
+            ace += sum(m[0] for m in storm_energy(columns, j, offsets[j], offsets[j + 1]).values())
+            max_wind = max(max_wind, masked_max(columns, 'wind', offsets[j], offsets[j + 1]))
+        elapsed = hours[offsets[chain[-1] + 1] - 1] - hours[offsets[k]]
+        merged.append({'ids': [columns['id'][j] for j in chain], 'names': [columns['name'][j] for j in chain],
+                       'rows': chain, 'distance': distance, 'hours': elapsed,
+                       'mean_speed': distance / elapsed if elapsed > 0 else 0.0,
+                       'max_wind': max_wind, 'ace': ace})
+    return merged
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    # crossovers need both oceans: read the Atlantic file into the same columns
+    # read_HURDAT2_columns('hurdat2-1851-2016-041117.txt', columns)
+    links = link_crossovers(columns)
+    print(len(links), 'crossovers found')
+    for m in merged_storms(columns, links):
+        print(' -> '.join('{} {}'.format(i, n) for i, n in zip(m['ids'], m['names'])),
+              'distance: {:.0f} nm, mean speed: {:.1f} kt, max wind: {}, ACE: {:.2f}'.format(
+                  m['distance'], m['mean_speed'], m['max_wind'], m['ace']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Columnar export of the fix-level table and the per-storm summary table.
+
+With pyarrow installed, tables are written as Parquet with dictionary-encoded
+string columns, compression and row-group statistics. Without it, an
+equivalent pure-Python format is written instead: row groups of zlib
+compressed typed columns, string columns dictionary encoded, and a JSON
+footer holding the schema, the dictionaries and per row-group min/max
+statistics. read_table reads either format and uses the statistics to skip
+row groups that cannot match its filters.
+"""
+
+import array
+import json
+import struct
+import sys
+import zlib
+from hurdat_columns import RADII_COLUMNS, read_HURDAT2_columns, storm_slices
+from cyclone_energy import storm_energy
+from segmented import count_if, segment_reduce
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+HCOL_MAGIC = b'HCOL'
+
+FIX_COLUMNS = ['date', 'time', 'hours', 'record', 'status', 'lat', 'lon', 'wind', 'pressure'] + \
+    RADII_COLUMNS + ['speed', 'heading', 'distance']
+
+FILTER_OPS = {'==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+              '<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+              '>': lambda a, b: a > b, '>=': lambda a, b: a >= b}
+
+
+def fix_table(columns: dict) -> dict:
+    """Given a columnar dataset, return the fix-level table: the storm id of
+    every fix followed by the fix columns.
+    :param columns: columnar dataset
+    :return: dictionary of column name: list, all of the same length
+    """
+    ids = []
+    for k, start, end in storm_slices(columns):
+        ids.extend([columns['id'][k]] * (end - start))
+    table = {'id': ids}
+    for name in FIX_COLUMNS:
+        table[name] = columns[name]
+    return table
+
+
+def storm_summary_table(columns: dict) -> dict:
+    """Given a columnar dataset, return one summary row per storm.
+    :param columns: columnar dataset
+    :return: dictionary of column name: list with 'id', 'name', 'basin', 'year',
+     'num_rows', 'start', 'end' (hours), 'max_wind', 'min_pressure' (-999 if unknown),
+     'landfalls', 'distance' (nm), 'mean_speed', 'max_speed' (kt) and 'ace'
+    """
+    offsets = columns['offsets']
+    table = {'id': columns['id'], 'name': columns['name'], 'basin': columns['basin'], 'year': columns['year'],
+             'num_rows': segment_reduce(columns['hours'], offsets, 'count'),
+             'start': segment_reduce(columns['hours'], offsets, 'first'),
+             'end': segment_reduce(columns['hours'], offsets, 'last'),
+             'max_wind': segment_reduce(columns['wind'], offsets, 'max', columns['wind_valid']),
+             'min_pressure': segment_reduce(columns['pressure'], offsets, 'min', columns['pressure_valid']),
+             'landfalls': count_if(columns['record'], offsets, lambda record: record == 'L'),
+             'distance': segment_reduce(columns['distance'], offsets, 'last'),
+             'mean_speed': [],
+             'max_speed': segment_reduce(columns['speed'], offsets, 'max'),
+             'ace': []}
+    for k, start, end in storm_slices(columns):
+        time = table['end'][k] - table['start'][k]
+        table['mean_speed'].append(table['distance'][k] / time if time else 0.0)
+        table['ace'].append(sum(m[0] for m in storm_energy(columns, k, start, end).values()))
+    return table
+
+
+def _column_type(values: list) -> str:
+    """Return the storage type of a column: 'int', 'float' or 'dict' (strings)."""
+    if all(isinstance(v, int) for v in values):
+        return 'int'
+    if all(isinstance(v, (int, float)) for v in values):
+        return 'float'
+    return 'dict'
+
+
+def _pack(typecode: str, values) -> bytes:
+    """Return values as compressed little-endian bytes."""
+    data = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return zlib.compress(data.tobytes())
+
+
+def _unpack(typecode: str, data: bytes) -> list:
+    """Return the values of bytes written by _pack."""
+    values = array.array(typecode)
+    values.frombytes(zlib.decompress(data))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+def write_hcol(table: dict, filename: str, row_group_size: int = 65536):
+    """Write a table in the pure-Python columnar format.
+    :param table: dictionary of column name: list, all of the same length
+    :param filename: path of the file to write
+    :param row_group_size: rows per row group
+    """
+    names = list(table)
+    rows = len(table[names[0]]) if names else 0
+    footer = {'rows': rows, 'columns': [], 'row_groups': []}
+    codes = {}
+    for name in names:
+        kind = _column_type(table[name])
+        column = {'name': name, 'type': kind}
+        if kind == 'dict':
+            if not all(isinstance(value, str) for value in table[name]):
+                raise ValueError('Invalid column {} given: values must be all numbers or all strings.'.format(name))
+            dictionary = sorted(set(table[name]))
+            column['dictionary'] = dictionary
+            position = {value: i for i, value in enumerate(dictionary)}
+            codes[name] = [position[value] for value in table[name]]
+        footer['columns'].append(column)
+
+    with open(filename, 'wb') as f:
+        f.write(HCOL_MAGIC)
+        for first in range(0, rows, row_group_size):
+            last = min(first + row_group_size, rows)
+            group = {'rows': last - first, 'columns': []}
+            for column in footer['columns']:
+                values = table[column['name']][first:last]
+                if column['type'] == 'dict':
+                    data = _pack('i', codes[column['name']][first:last])
+                else:
+                    data = _pack('q' if column['type'] == 'int' else 'd', values)
+                group['columns'].append({'offset': f.tell(), 'length': len(data),
+                                         'min': min(values), 'max': max(values)})
+                f.write(data)
+            footer['row_groups'].append(group)
+        encoded = json.dumps(footer).encode('utf-8')
+        f.write(encoded + struct.pack('<I', len(encoded)) + HCOL_MAGIC)
+
+
+def _group_may_match(group: dict, positions: dict, filters: list) -> bool:
+    """Return False if a row group's min/max statistics rule out every filter match."""
+    for name, op, value in filters:
+        stats = group['columns'][positions[name]]
+        low, high = stats['min'], stats['max']
+        if op == '==' and not low <= value <= high:
+            return False
+        if op in ['<', '<='] and not FILTER_OPS[op](low, value):
+            return False
+        if op in ['>', '>='] and not FILTER_OPS[op](high, value):
+            return False
+    return True
+
+
+def read_hcol(filename: str, columns: list = None, filters: list = None) -> dict:
+    """Read a table written by write_hcol.
+    :param filename: path of the file
+    :param columns: Optional. Names of the columns to read; all by default.
+    :param filters: Optional. List of (column, op, value) filters that rows must all match,
+     with op one of '==', '!=', '<', '<=', '>', '>='.
+    :return: dictionary of column name: list
+    """
+    filters = filters or []
+    with open(filename, 'rb') as f:
+        f.seek(-8, 2)
+        length, magic = struct.unpack('<I4s', f.read(8))
+        if magic != HCOL_MAGIC:
+            raise ValueError('{} is not a columnar table file.'.format(filename))
+        f.seek(-8 - length, 2)
+        footer = json.loads(f.read(length).decode('utf-8'))
+        positions = {c['name']: i for i, c in enumerate(footer['columns'])}
+        wanted = columns if columns is not None else [c['name'] for c in footer['columns']]
+        needed = list(wanted) + [name for name, op, value in filters if name not in wanted]
+
+        table = {name: [] for name in wanted}
+        for group in footer['row_groups']:
+            if not _group_may_match(group, positions, filters):
+                continue
+            values = {}
+            for name in needed:
+                column = footer['columns'][positions[name]]
+                stats = group['columns'][positions[name]]
+                f.seek(stats['offset'])
+                data = f.read(stats['length'])
+                if column['type'] == 'dict':
+                    dictionary = column['dictionary']
+                    values[name] = [dictionary[i] for i in _unpack('i', data)]
+                else:
+                    values[name] = _unpack('q' if column['type'] == 'int' else 'd', data)
+            keep = range(group['rows'])
+            for name, op, value in filters:
+                test = FILTER_OPS[op]
+                keep = [i for i in keep if test(values[name][i], value)]
+            for name in wanted:
+                table[name].extend([values[name][i] for i in keep])
+    return table
+
+
+def write_table(table: dict, filename: str, row_group_size: int = 65536, use_arrow: bool = None):
+    """Write a table as Parquet when pyarrow is available, otherwise in the
+    pure-Python columnar format.
+    :param table: dictionary of column name: list, all of the same length
+    :param filename: path of the file to write
+    :param row_group_size: rows per row group
+    :param use_arrow: Optional. Force (True) or avoid (False) pyarrow; by default use it if installed.
+    """
+    if use_arrow is None:
+        use_arrow = pyarrow is not None
+    if not use_arrow:
+        write_hcol(table, filename, row_group_size)
+        return
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to write Parquet files.')
+    arrays = {}
+    for name in table:
+        values = pyarrow.array(table[name])
+        if _column_type(table[name]) == 'dict':
+            values = values.dictionary_encode()
+        arrays[name] = values
+    pyarrow.parquet.write_table(pyarrow.table(arrays), filename, row_group_size=row_group_size,
+                                compression='zstd', write_statistics=True)
+
+
+def read_table(filename: str, columns: list = None, filters: list = None) -> dict:
+    """Read a table written by write_table, in either format.
+    :param filename: path of the file
+    :param columns: Optional. Names of the columns to read; all by default.
+    :param filters: Optional. List of (column, op, value) filters, see read_hcol.
+    :return: dictionary of column name: list
+    """
+    with open(filename, 'rb') as f:
+        magic = f.read(4)
+    if magic == HCOL_MAGIC:
+        return read_hcol(filename, columns, filters)
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to read {}.'.format(filename))
+    return pyarrow.parquet.read_table(filename, columns=columns, filters=filters or None).to_pydict()
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    write_table(fix_table(columns), 'fixes.hcol' if pyarrow is None else 'fixes.parquet')
+    write_table(storm_summary_table(columns), 'storms.hcol' if pyarrow is None else 'storms.parquet')
+    print('wrote', len(columns['hours']), 'fixes and', len(columns['id']), 'storms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Accumulated Cyclone Energy (ACE), power dissipation index (PDI) and
+hurricane-days per storm, year, month and basin.
+"""
+
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+
+
+# HURDAT2 energy metrics only count the synoptic fixes, not the extra
+# landfall / peak intensity rows
+SYNOPTIC_TIMES = {'0000', '0600', '1200', '1800'}
+
+# ACE and PDI count tropical or subtropical systems at tropical storm strength
+ENERGY_STATUS = {'TS', 'HU', 'SS'}
+
+
+def fix_energy(status: str, time: str, wind: int):
+    """Given the status, time and wind of one fix, return its contribution
+    to ACE (10^4 kt^2), PDI (10^6 kt^3) and hurricane-days.
+    :param status: system status, column 3
+    :param time: 24-hr time as a string like '1800'
+    :param wind: maximum sustained wind in knots
+    :return: ace, pdi and hurricane-days of the fix
+    """
+    if time not in SYNOPTIC_TIMES or status not in ENERGY_STATUS or wind < 34:
+        return 0.0, 0.0, 0.0
+    return wind * wind / 1e4, wind * wind * wind / 1e6, 0.25 if status == 'HU' else 0.0
+
+
+def storm_energy(columns: dict, k: int, start: int, end: int, wind_column: str = 'wind') -> dict:
+    """Given one storm of a columnar dataset, return its energy metrics broken
+    down by calendar month.
+    :param columns: columnar dataset
+    :param k: storm index
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param wind_column: Optional. Column of winds to use, like 'wind_filled' from fill_pressure_wind.
+    :return: dictionary of month: [ace, pdi, hurricane-days]
+    """
+    status = columns['status']
+    time = columns['time']
+    date = columns['date']
+    wind = columns[wind_column]
+    months = {}
+    for i in range(start, end):
+        ace, pdi, days = fix_energy(status[i], time[i], wind[i])
+        if ace == 0.0:
+            continue
+        month = int(date[i][4:6])
+        if month not in months:
+            months[month] = [0.0, 0.0, 0.0]
+        months[month][0] += ace
+        months[month][1] += pdi
+        months[month][2] += days
+    return months
+
+
+def new_energy_totals() -> dict:
+    """Return empty energy totals. Each of 'storm', 'year', 'month' and 'basin'
+    maps its key to [ace, pdi, hurricane-days]; 'parts' remembers what every
+    storm contributed so it can be replaced later."""
+    return {'storm': {}, 'year': {}, 'month': {}, 'basin': {}, 'parts': {}}
+
+
+def _add(table: dict, key, values: list, sign: int = 1):
+    """Add (or subtract, with sign=-1) [ace, pdi, hurricane-days] into table[key]."""
+    if key not in table:
+        table[key] = [0.0, 0.0, 0.0]
+    for i in range(3):
+        table[key][i] += sign * values[i]
+
+
+def update_energy_totals(totals: dict, columns: dict, storms=None, wind_column: str = 'wind') -> dict:
+    """Given energy totals and a columnar dataset, add the energy of the given
+    storms. A storm id already in the totals has its old contribution replaced,
+    so the totals can be updated incrementally as storms gain fixes.
+    :param totals: totals from new_energy_totals, updated in place
+    :param columns: columnar dataset
+    :param storms: Optional. Storm indices to (re)count; all storms by default.
+    :param wind_column: Optional. Column of winds to use, see storm_energy.
+    :return: the updated totals
+    """
+    offsets = columns['offsets']
+    if storms is None:
+        slices = storm_slices(columns)
+    else:
+        slices = ((k, offsets[k], offsets[k + 1]) for k in storms)
+
+    for k, start, end in slices:
+        storm_id = columns['id'][k]
+        if storm_id in totals['parts']:
+            year, basin, months = totals['parts'][storm_id]
+            for month in months:
+                _add(totals['month'], month, months[month], -1)
+                _add(totals['year'], year, months[month], -1)
+                _add(totals['basin'], basin, months[month], -1)
+
+        year = columns['year'][k]
+        basin = columns['basin'][k]
+        months = storm_energy(columns, k, start, end, wind_column)
+        totals['storm'][storm_id] = [0.0, 0.0, 0.0]
+        for month in months:
+            _add(totals['storm'], storm_id, months[month])
+            _add(totals['month'], month, months[month])
+            _add(totals['year'], year, months[month])
+            _add(totals['basin'], basin, months[month])
+        totals['parts'][storm_id] = (year, basin, months)
+    return totals
+
+
+def energy_totals(columns: dict, wind_column: str = 'wind') -> dict:
+    """Given a columnar dataset, return the energy totals of all its storms.
+    :param columns: columnar dataset
+    :param wind_column: Optional. Column of winds to use, see storm_energy.
+    :return: energy totals, see new_energy_totals
+    """
+    return update_energy_totals(new_energy_totals(), columns, wind_column=wind_column)
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    totals = energy_totals(read_HURDAT2_columns(filename))
+    for y in sorted(totals['year']):
+        ace, pdi, days = totals['year'][y]
+        print('year', y, 'ACE: {:.1f}, PDI: {:.1f}, hurricane-days: {:.2f}'.format(ace, pdi, days))
+    for m in sorted(totals['month']):
+        print('month', m, 'ACE: {:.1f}'.format(totals['month'][m][0]))
+
+
+if __name__ == '__main__':
+    main()
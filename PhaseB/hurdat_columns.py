@@ -0,0 +1,207 @@
+"""
+Columnar view of a HURDAT2 file: one flat list per column for every fix in the
+archive, plus per-storm header columns and the row offsets of each storm.
+"""
+
+import bisect
+import datetime
+from PhaseB_5 import read_one_HURDAT2_storm
+from track_geometry import gc_distance, gc_bearing, METERS_PER_NM
+
+
+# the 12 quadrant wind radii, in the HURDAT2 column order (8-19)
+RADII_COLUMNS = ['ne34', 'se34', 'sw34', 'nw34',
+                 'ne50', 'se50', 'sw50', 'nw50',
+                 'ne64', 'se64', 'sw64', 'nw64']
+
+# columns that use the -999 sentinel for missing values; each gets a '<name>_valid'
+# bytearray holding 1 where the value is known
+MISSING = -999
+MASKED_COLUMNS = ['wind', 'pressure'] + RADII_COLUMNS
+
+# lowest maximum sustained wind of a hurricane, in knots
+HURRICANE_WIND = 64
+
+# hours are counted from 0001-01-01 0000Z
+EPOCH_ORDINAL = datetime.date(1, 1, 1).toordinal()
+
+
+def parse_latitude(lat: str) -> float:
+    """Given a HURDAT2 latitude string like '28.0N', return signed degrees.
+    :param lat: latitude as a string
+    :return: latitude in degrees, negative in the southern hemisphere
+    """
+    if lat[-1] in ['N', 'S']:
+        value = float(lat[:-1])
+        return -value if lat[-1] == 'S' else value
+    return float(lat)
+
+
+def parse_longitude(lon: str) -> float:
+    """Given a HURDAT2 longitude string like '93.5W', return signed degrees
+    normalized into [-180, 180], the same way myLatLon does.
+    :param lon: longitude as a string
+    :return: longitude in degrees, negative in the western hemisphere
+    """
+    if lon[-1] in ['E', 'W']:
+        value = float(lon[:-1])
+        value = -value if lon[-1] == 'W' else value
+    else:
+        value = float(lon)
+    if value > 180.0:
+        value -= 360.0
+    elif value < -180.0:
+        value += 360.0
+    return value
+
+
+def format_position(value: float, positive: str, negative: str) -> str:
+    """Given signed degrees, return a HURDAT2 latitude or longitude string like '28.0N'.
+    :param value: latitude or longitude in degrees
+    :param positive: hemisphere letter of positive values, 'N' or 'E'
+    :param negative: hemisphere letter of negative values, 'S' or 'W'
+    """
+    return '{:.1f}{}'.format(abs(value), positive if value >= 0 else negative)
+
+
+def fix_hours(date: str, time: str) -> float:
+    """Given the date and time columns of a fix, return the hours elapsed
+    since the column epoch, without going through strptime.
+    :param date: date as a string like '20160228'
+    :param time: 24-hr time as a string like '1830'
+    :return: hours since the epoch, as a float
+    """
+    days = datetime.date(int(date[:4]), int(date[4:6]), int(date[6:8])).toordinal() - EPOCH_ORDINAL
+    return days * 24.0 + int(time[:2]) + int(time[2:4]) / 60.0
+
+
+def hours_to_datetime(hours: float) -> datetime.datetime:
+    """Given hours since the column epoch, return the matching datetime.
+    :param hours: hours since the epoch
+    :return: a datetime rounded to the minute
+    """
+    return datetime.datetime(1, 1, 1) + datetime.timedelta(minutes=round(hours * 60))
+
+
+def new_columns() -> dict:
+    """Return an empty columnar dataset."""
+    columns = {'id': [], 'name': [], 'basin': [], 'year': [], 'offsets': [0],
+               'date': [], 'time': [], 'hours': [], 'record': [], 'status': [],
+               'lat': [], 'lon': [], 'wind': [], 'pressure': [],
+               'speed': [], 'heading': [], 'distance': []}
+    for name in RADII_COLUMNS:
+        columns[name] = []
+    for name in MASKED_COLUMNS:
+        columns[name + '_valid'] = bytearray()
+    return columns
+
+
+def validity_mask(values: list) -> bytearray:
+    """Given a column using the -999 sentinel, return its validity mask."""
+    return bytearray(value != MISSING for value in values)
+
+
+def append_storm(columns: dict, storm: dict):
+    """Given a columnar dataset and a HURDAT2 storm dictionary,
+    append the storm's header and rows to the columns.
+    :param columns: columnar dataset to extend
+    :param storm: dictionary with all of one storm's data
+    """
+    columns['id'].append(storm['id'])
+    columns['name'].append(storm['name'])
+    columns['basin'].append(storm['id'][:2])
+    columns['year'].append(int(storm['id'][-4:]))
+    for r in storm['rows']:
+        append_row(columns, r)
+    columns['offsets'].append(len(columns['date']))
+
+
+def append_row(columns: dict, r: list):
+    """Given a columnar dataset and one HURDAT2 data row, append the row to the
+    fix columns and validity masks. The motion columns and offsets are left to the caller.
+    :param columns: columnar dataset to extend
+    :param r: one data row, as read by read_one_HURDAT2_storm
+    """
+    columns['date'].append(r[0])
+    columns['time'].append(r[1])
+    columns['hours'].append(fix_hours(r[0], r[1]))
+    columns['record'].append(r[2].strip())
+    columns['status'].append(r[3].strip())
+    columns['lat'].append(parse_latitude(r[4]))
+    columns['lon'].append(parse_longitude(r[5]))
+    columns['wind'].append(r[6])
+    columns['pressure'].append(r[7])
+    for i, name in enumerate(RADII_COLUMNS):
+        columns[name].append(r[8 + i] if len(r) > 8 + i else MISSING)
+    for name in MASKED_COLUMNS:
+        columns[name + '_valid'].append(columns[name][-1] != MISSING)
+
+
+def add_motion_columns(columns: dict) -> dict:
+    """Given a columnar dataset, fill in the motion columns of every storm
+    that does not have them yet:
+    'speed' - translation speed in knots of the segment leaving the fix,
+    'heading' - initial bearing in degrees of the segment leaving the fix,
+    'distance' - along-track distance in nautical miles from the first fix.
+    The last fix of a storm repeats the speed and heading of the segment
+    arriving at it, so the columns line up one to one with the fixes.
+    :param columns: columnar dataset, updated in place
+    :return: the columnar dataset
+    """
+    hours = columns['hours']
+    lat = columns['lat']
+    lon = columns['lon']
+    speed = columns['speed']
+    heading = columns['heading']
+    distance = columns['distance']
+    offsets = columns['offsets']
+    # start at the storm the motion columns stop in; earlier storms are done
+    first = max(0, bisect.bisect_right(offsets, len(speed)) - 1)
+    for k in range(first, len(offsets) - 1):
+        start = offsets[k]
+        end = offsets[k + 1]
+        del speed[start:], heading[start:], distance[start:]
+        travelled = 0.0
+        for i in range(start, end - 1):
+            nm = gc_distance(lat[i], lon[i], lat[i + 1], lon[i + 1]) / METERS_PER_NM
+            elapsed = hours[i + 1] - hours[i]
+            speed.append(nm / elapsed if elapsed > 0 else 0.0)
+            heading.append(gc_bearing(lat[i], lon[i], lat[i + 1], lon[i + 1]))
+            distance.append(travelled)
+            travelled += nm
+        speed.append(speed[-1] if end - start > 1 else 0.0)
+        heading.append(heading[-1] if end - start > 1 else 0.0)
+        distance.append(travelled)
+    return columns
+
+
+def read_HURDAT2_columns(filename: str, columns: dict = None) -> dict:
+    """Read every storm of a HURDAT2 file into a columnar dataset.
+    The dataset is a dictionary of flat lists. Header columns ('id', 'name',
+    'basin', 'year') have one entry per storm; fix columns ('date', 'time',
+    'hours', 'record', 'status', 'lat', 'lon', 'wind', 'pressure', the
+    RADII_COLUMNS and the motion columns of add_motion_columns) have one
+    entry per fix, and every column of MASKED_COLUMNS has a '<name>_valid'
+    validity mask next to it. The rows of storm k are offsets[k]:offsets[k + 1].
+    :param filename: path of a HURDAT2 file
+    :param columns: Optional. An existing dataset to append to, so both basins can share one.
+    :return: the columnar dataset
+    """
+    if columns is None:
+        columns = new_columns()
+    with open(filename, 'r') as f:
+        while True:
+            s = read_one_HURDAT2_storm(f)
+            if s is None:
+                break  # hit end of file
+            append_storm(columns, s)
+    return add_motion_columns(columns)
+
+
+def storm_slices(columns: dict):
+    """Given a columnar dataset, yield (storm index, start, end) for every storm.
+    :param columns: columnar dataset
+    """
+    offsets = columns['offsets']
+    for k in range(len(offsets) - 1):
+        yield k, offsets[k], offsets[k + 1]
@@ -0,0 +1,238 @@
+"""
+Landfall events table: every fix flagged 'L' in the record identifier column
+(column 2), matched to the nearest named coastal segment, plus probable
+unmarked landfalls found where an early track crosses the coastline.
+
+The coastline is the coarse, locally bundled coastline_segments.txt. Each
+segment is digitized with land on its left-hand side, so the side of the
+coast a track point lies on tells sea from land.
+"""
+
+import math
+from hurdat_columns import MISSING, read_HURDAT2_columns, storm_slices, parse_latitude, parse_longitude, \
+    hours_to_datetime
+from track_geometry import KM_PER_DEGREE
+from masked_columns import mask_of
+
+# size of a spatial index cell, in degrees
+CELL_SIZE = 1.0
+
+
+def read_coastline(filename: str = 'coastline_segments.txt') -> list:
+    """Read the bundled coastline file. It is laid out like HURDAT2: a header
+    line with the segment name and point count, followed by one lat, lon row
+    per point.
+    :param filename: path of the coastline file
+    :return: list of (name, [(lat, lon), ...]) segments
+    """
+    segments = []
+    with open(filename, 'r') as f:
+        while True:
+            header = f.readline()
+            if header is None or header == '':
+                break
+            values = header.split(',')
+            name = values[0].strip()
+            points = []
+            for r in range(int(values[1])):
+                lat, lon = f.readline().split(',')[:2]
+                points.append((parse_latitude(lat.strip()), parse_longitude(lon.strip())))
+            segments.append((name, points))
+    return segments
+
+
+def _cell(lat: float, lon: float) -> tuple:
+    """Return the spatial index cell holding a point."""
+    return int(math.floor(lat / CELL_SIZE)), int(math.floor(lon / CELL_SIZE))
+
+
+def build_coast_index(segments: list) -> dict:
+    """Given coastline segments, return a grid index of their edges.
+    Every edge is listed in each cell its bounding box touches.
+    :param segments: segments from read_coastline
+    :return: dictionary with 'names', 'edges' as (segment, lat1, lon1, lat2, lon2) and 'cells'
+    """
+    index = {'names': [], 'edges': [], 'cells': {}}
+    for s, (name, points) in enumerate(segments):
+        index['names'].append(name)
+        for i in range(len(points) - 1):
+            (lat1, lon1), (lat2, lon2) = points[i], points[i + 1]
+            e = len(index['edges'])
+            index['edges'].append((s, lat1, lon1, lat2, lon2))
+            low = _cell(min(lat1, lat2), min(lon1, lon2))
+            high = _cell(max(lat1, lat2), max(lon1, lon2))
+            for a in range(low[0], high[0] + 1):
+                for b in range(low[1], high[1] + 1):
+                    index['cells'].setdefault((a, b), []).append(e)
+    return index
+
+
+def _edge_distance(lat: float, lon: float, edge: tuple) -> float:
+    """Return the distance in km from a point to a coast edge, on a local
+    equirectangular projection centred on the point."""
+    scale = math.cos(math.radians(lat))
+    x1 = (edge[2] - lon) * scale
+    y1 = edge[1] - lat
+    x2 = (edge[4] - lon) * scale
+    y2 = edge[3] - lat
+    dx = x2 - x1
+    dy = y2 - y1
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length))
+    return math.hypot(x1 + t * dx, y1 + t * dy) * KM_PER_DEGREE
+
+
+def nearest_coast(index: dict, lat: float, lon: float, max_km: float = 300.0):
+    """Given a coast index and a point, return the nearest coastal segment.
+    Cells are searched in growing rings until no closer edge can exist.
+    :param index: index from build_coast_index
+    :param lat: latitude in degrees
+    :param lon: longitude in degrees
+    :param max_km: search radius in km
+    :return: (segment name, distance in km), or (None, None) if none is within max_km
+    """
+    row, col = _cell(lat, lon)
+    best = None
+    best_distance = max_km
+    max_ring = int(max_km / (KM_PER_DEGREE * CELL_SIZE * max(math.cos(math.radians(lat)), 0.1))) + 1
+    for ring in range(max_ring + 1):
+        # every cell of this ring is at least (ring - 1) cells away
+        if best is not None and (ring - 1) * CELL_SIZE * KM_PER_DEGREE * math.cos(math.radians(lat)) > best_distance:
+            break
+        for a in range(row - ring, row + ring + 1):
+            for b in range(col - ring, col + ring + 1):
+                if max(abs(a - row), abs(b - col)) != ring:
+                    continue
+                for e in index['cells'].get((a, b), ()):
+                    distance = _edge_distance(lat, lon, index['edges'][e])
+                    if distance <= best_distance:
+                        best = e
+                        best_distance = distance
+    if best is None:
+        return None, None
+    return index['names'][index['edges'][best][0]], best_distance
+
+
+def _crossing(lat1: float, lon1: float, lat2: float, lon2: float, edge: tuple):
+    """Return the fraction along the track segment where it crosses the coast
+    edge from sea to land, or None if it does not."""
+    ex = edge[4] - edge[2]
+    ey = edge[3] - edge[1]
+    # land is on the left of the edge, so the side is positive over land:
+    side1 = ex * (lat1 - edge[1]) - ey * (lon1 - edge[2])
+    side2 = ex * (lat2 - edge[1]) - ey * (lon2 - edge[2])
+    if not (side1 < 0 <= side2):
+        return None
+    tx = lon2 - lon1
+    ty = lat2 - lat1
+    denominator = tx * ey - ty * ex
+    if denominator == 0:
+        return None
+    t = ((edge[2] - lon1) * ey - (edge[1] - lat1) * ex) / denominator
+    u = ((edge[2] - lon1) * ty - (edge[1] - lat1) * tx) / denominator
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return t
+    return None
+
+
+def _event(columns: dict, k: int, i: int, lat: float, lon: float, hours: float,
+           wind: int, pressure: int, marked: bool, index: dict) -> dict:
+    """Return one row of the landfall events table."""
+    segment, distance = nearest_coast(index, lat, lon)
+    return {'id': columns['id'][k], 'name': columns['name'][k], 'time': hours_to_datetime(hours),
+            'lat': lat, 'lon': lon, 'wind': wind, 'pressure': pressure, 'status': columns['status'][i],
+            'segment': segment, 'coast_distance': distance, 'marked': marked}
+
+
+def storm_crossings(columns: dict, index: dict, start: int, end: int) -> list:
+    """Given one storm of a columnar dataset, return where its track crosses
+    the coastline from sea to land.
+    :param columns: columnar dataset
+    :param index: index from build_coast_index
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :return: list of (row before the crossing, fraction along the segment)
+    """
+    lat = columns['lat']
+    lon = columns['lon']
+    crossings = []
+    for i in range(start, end - 1):
+        lon1 = lon[i]
+        lon2 = lon[i + 1]
+        # keep segments across the 180th meridian short:
+        if lon2 - lon1 > 180.0:
+            lon2 -= 360.0
+        elif lon1 - lon2 > 180.0:
+            lon2 += 360.0
+        low = _cell(min(lat[i], lat[i + 1]), min(lon1, lon2))
+        high = _cell(max(lat[i], lat[i + 1]), max(lon1, lon2))
+        seen = set()
+        best = None
+        for a in range(low[0], high[0] + 1):
+            for b in range(low[1], high[1] + 1):
+                for e in index['cells'].get((a, b), ()):
+                    if e in seen:
+                        continue
+                    seen.add(e)
+                    t = _crossing(lat[i], lon1, lat[i + 1], lon2, index['edges'][e])
+                    if t is not None and (best is None or t < best):
+                        best = t
+        if best is not None:
+            crossings.append((i, best))
+    return crossings
+
+
+def landfall_events(columns: dict, index: dict, unmarked_before: int = 1951) -> list:
+    """Given a columnar dataset and a coast index, return the landfall events
+    table. Fixes flagged 'L' are always included. For storms earlier than
+    `unmarked_before`, track segments that cross the coast with no 'L' fix
+    at either end are added as probable unmarked landfalls, with time,
+    position and intensity interpolated at the crossing; a wind or pressure
+    unknown at either end of the segment is -999 at the crossing.
+    :param columns: columnar dataset
+    :param index: index from build_coast_index
+    :param unmarked_before: first year whose landfalls are trusted to be flagged
+    :return: list of event dictionaries, in storm and time order
+    """
+    record = columns['record']
+    wind_valid = mask_of(columns, 'wind')
+    pressure_valid = mask_of(columns, 'pressure')
+    events = []
+    for k, start, end in storm_slices(columns):
+        storm_events = []
+        for i in range(start, end):
+            if record[i] == 'L':
+                storm_events.append(_event(columns, k, i, columns['lat'][i], columns['lon'][i],
+                                           columns['hours'][i], columns['wind'][i],
+                                           columns['pressure'][i], True, index))
+        if columns['year'][k] < unmarked_before:
+            for i, t in storm_crossings(columns, index, start, end):
+                if record[i] == 'L' or record[i + 1] == 'L':
+                    continue
+
+                def between(name):
+                    return columns[name][i] + t * (columns[name][i + 1] - columns[name][i])
+
+                wind = round(between('wind')) if wind_valid[i] and wind_valid[i + 1] else MISSING
+                pressure = round(between('pressure')) if pressure_valid[i] and pressure_valid[i + 1] else MISSING
+                storm_events.append(_event(columns, k, i, between('lat'), between('lon'), between('hours'),
+                                           wind, pressure, False, index))
+            storm_events.sort(key=lambda e: e['time'])
+        events.extend(storm_events)
+    return events
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    index = build_coast_index(read_coastline())
+    for e in landfall_events(read_HURDAT2_columns(filename), index):
+        print(e['id'], e['name'], e['time'], '{:.1f}, {:.1f}'.format(e['lat'], e['lon']),
+              e['wind'], 'kt', e['segment'], '' if e['marked'] else '(probable, unmarked)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Regular lat/lon grids for rasterized climatologies, and a compact binary
+grid file holding one or more named layers.
+"""
+
+import array
+import math
+import struct
+import sys
+
+
+GRID_MAGIC = b'HGRD'
+GRID_HEADER = '<4sIIdddI'  # magic, rows, cols, lat_min, lon_min, resolution, layer count
+
+
+def make_grid(lat_min: float = 0.0, lat_max: float = 60.0, lon_min: float = -180.0, lon_max: float = 0.0,
+              resolution: float = 0.25) -> dict:
+    """Return a grid description. Cell (r, c) covers latitudes
+    lat_min + r * resolution upwards and longitudes lon_min + c * resolution
+    eastwards; cells are numbered r * cols + c.
+    :param lat_min: southern edge in degrees
+    :param lat_max: northern edge in degrees
+    :param lon_min: western edge in degrees
+    :param lon_max: eastern edge in degrees
+    :param resolution: cell size in degrees
+    :return: dictionary describing the grid
+    """
+    return {'lat_min': lat_min, 'lon_min': lon_min, 'resolution': resolution,
+            'rows': int(round((lat_max - lat_min) / resolution)),
+            'cols': int(round((lon_max - lon_min) / resolution))}
+
+
+def cell_of(grid: dict, lat: float, lon: float):
+    """Given a grid and a point, return the number of the cell holding it, or None outside the grid."""
+    r = int(math.floor((lat - grid['lat_min']) / grid['resolution']))
+    c = int(math.floor((lon - grid['lon_min']) / grid['resolution']))
+    if 0 <= r < grid['rows'] and 0 <= c < grid['cols']:
+        return r * grid['cols'] + c
+    return None
+
+
+def cell_center(grid: dict, cell: int) -> tuple:
+    """Given a grid and a cell number, return the (lat, lon) of the cell centre."""
+    r, c = divmod(cell, grid['cols'])
+    return (grid['lat_min'] + (r + 0.5) * grid['resolution'],
+            grid['lon_min'] + (c + 0.5) * grid['resolution'])
+
+
+def new_layer(grid: dict, typecode: str = 'I') -> array.array:
+    """Return a zeroed layer with one value per cell of the grid."""
+    return array.array(typecode, bytes(array.array(typecode).itemsize * grid['rows'] * grid['cols']))
+
+
+def add_layer(total: array.array, part: array.array):
+    """Add a partial layer into a running total, cell by cell."""
+    for i, value in enumerate(part):
+        if value:
+            total[i] += value
+
+
+def write_grid(filename: str, grid: dict, layers: dict):
+    """Write named layers of a grid to a compact little-endian binary file.
+    :param filename: path of the file to write
+    :param grid: grid description from make_grid
+    :param layers: dictionary of layer name: array with one value per cell
+    """
+    with open(filename, 'wb') as f:
+        f.write(struct.pack(GRID_HEADER, GRID_MAGIC, grid['rows'], grid['cols'],
+                            grid['lat_min'], grid['lon_min'], grid['resolution'], len(layers)))
+        for name in layers:
+            encoded = name.encode('utf-8')
+            f.write(struct.pack('<H', len(encoded)) + encoded + layers[name].typecode.encode('ascii'))
+            layer = layers[name]
+            if sys.byteorder == 'big':
+                layer = array.array(layer.typecode, layer)
+                layer.byteswap()
+            layer.tofile(f)
+
+
+def read_grid(filename: str):
+    """Read a grid file written by write_grid.
+    :param filename: path of the grid file
+    :return: grid description and dictionary of layer name: array
+    """
+    with open(filename, 'rb') as f:
+        magic, rows, cols, lat_min, lon_min, resolution, count = \
+            struct.unpack(GRID_HEADER, f.read(struct.calcsize(GRID_HEADER)))
+        if magic != GRID_MAGIC:
+            raise ValueError('{} is not a grid file.'.format(filename))
+        grid = {'lat_min': lat_min, 'lon_min': lon_min, 'resolution': resolution, 'rows': rows, 'cols': cols}
+        layers = {}
+        for i in range(count):
+            (length,) = struct.unpack('<H', f.read(2))
+            name = f.read(length).decode('utf-8')
+            layer = array.array(f.read(1).decode('ascii'))
+            layer.fromfile(f, rows * cols)
+            if sys.byteorder == 'big':
+                layer.byteswap()
+            layers[name] = layer
+    return grid, layers
@@ -0,0 +1,126 @@
+"""
+Lazy storm records: the headers of a HURDAT2 file are indexed with the byte
+offset of every storm, and a storm's rows are only parsed when they are
+used. Filtering on header fields (id, name, year, basin, row count)
+therefore costs one pass over the header lines and no row parsing. Parsed
+rows are not kept by the storms; an optional row cache of bounded size
+keeps the most recently read ones.
+"""
+
+import time
+from collections import OrderedDict
+from PhaseB_5 import read_one_HURDAT2_storm, get_max_wind_speed
+
+
+# default number of decoded storms kept by a row cache
+ROW_CACHE_SIZE = 32
+
+
+class LazyStorm(dict):
+    """A storm dictionary shaped like the result of read_one_HURDAT2_storm,
+    holding 'id', 'name', 'num_rows', 'basin' and 'year' up front. Every read
+    of storm['rows'] returns a fresh list of the rows, parsed then or taken
+    from the row cache, so the storm itself never holds on to them. 'rows' in
+    storm is always False, and storm.get('rows') does not load them."""
+
+    def __init__(self, filename: str, offset: int, storm_id: str, name: str, num_rows: int, cache: dict = None):
+        super().__init__(id=storm_id, name=name, num_rows=num_rows,
+                         basin=storm_id[:2], year=int(storm_id[-4:]))
+        self.filename = filename
+        self.offset = offset
+        self.cache = cache
+
+    def __missing__(self, key):
+        if key != 'rows':
+            raise KeyError(key)
+        return read_storm_at(self.filename, self.offset, self.cache)['rows']
+
+
+def new_row_cache(size: int = ROW_CACHE_SIZE) -> dict:
+    """Return an empty row cache for read_storm_at, keeping the `size` storms read last."""
+    return {'size': size, 'storms': OrderedDict()}
+
+
+def read_storm_at(filename: str, offset: int, cache: dict = None) -> dict:
+    """Read the storm whose header line starts at a byte offset of a HURDAT2
+    file. With a row cache, a cached storm is not read again, and the result
+    is a copy the caller may modify.
+    :param filename: path of a HURDAT2 file
+    :param offset: byte offset of the storm's header line
+    :param cache: Optional. Row cache from new_row_cache; None reads the file every time.
+    :return: a dictionary with the storm data, as read_one_HURDAT2_storm returns it
+    """
+    key = (filename, offset)
+    if cache is not None and key in cache['storms']:
+        cache['storms'].move_to_end(key)
+        storm = cache['storms'][key]
+    else:
+        with open(filename, 'r') as f:
+            f.seek(offset)
+            storm = read_one_HURDAT2_storm(f)
+        if cache is None:
+            return storm
+        cache['storms'][key] = storm
+        if len(cache['storms']) > cache['size']:
+            cache['storms'].popitem(last=False)
+    return dict(storm, rows=[list(r) for r in storm['rows']])
+
+
+def index_HURDAT2(filename: str, cache: dict = None) -> list:
+    """Index every storm of a HURDAT2 file from its header lines, skipping
+    over the data rows without parsing them.
+    :param filename: path of a HURDAT2 file
+    :param cache: Optional. Row cache from new_row_cache, shared by the storms.
+    :return: list of LazyStorm, in file order
+    """
+    storms = []
+    with open(filename, 'rb') as f:
+        offset = 0
+        while True:
+            header = f.readline()
+            if not header:
+                break  # hit end of file
+            fields = header.decode('ascii').split(',')
+            num_rows = int(fields[2])
+            storms.append(LazyStorm(filename, offset, fields[0].strip(), fields[1].strip(), num_rows, cache))
+            offset += len(header)
+            for r in range(num_rows):
+                offset += len(f.readline())
+    return storms
+
+
+def filter_storms(storms: list, year: int = None, basin: str = None, named: bool = None,
+                  min_rows: int = None) -> list:
+    """Return the storms matching every given header condition.
+    :param storms: storms from index_HURDAT2
+    :param year: Optional. Season year.
+    :param basin: Optional. Basin code like 'AL' or 'EP'.
+    :param named: Optional. True for named storms only, False for 'UNNAMED' ones only.
+    :param min_rows: Optional. Minimum number of data rows.
+    :return: list of the matching storms, still unparsed
+    """
+    return [s for s in storms
+            if (year is None or s['year'] == year)
+            and (basin is None or s['basin'] == basin)
+            and (named is None or (s['name'] != 'UNNAMED') == named)
+            and (min_rows is None or s['num_rows'] >= min_rows)]
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    start = time.time()
+    storms = index_HURDAT2(filename, new_row_cache())
+    selected = filter_storms(storms, year=2005, named=True)
+    print('indexed', len(storms), 'storms and found', len(selected),
+          'named storms of 2005 in {:.3f} s'.format(time.time() - start))
+    for s in selected:
+        max_wind, max_time = get_max_wind_speed(s)  # parses this storm's rows only
+        print(s['id'], s['name'], 'highest wind:', max_wind, 'first occurs at:', max_time)
+
+
+if __name__ == '__main__':
+    main()
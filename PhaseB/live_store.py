@@ -0,0 +1,182 @@
+"""
+Live ingestion of advisory fixes for active storms.
+
+Every storm is kept as its own small columnar dataset, so a new fix is an
+append to the end of its storm's lists. The motion columns, the quadrant
+test and the per-storm and per-year aggregates are updated from the new fix
+and the one before it only. Every accepted fix is written to a write-ahead
+log first; opening a store replays its log, so nothing is lost on restart.
+
+The feed is stood in for by a drop directory: each file dropped in it holds
+one or more storms in the HURDAT2 layout, usually just the latest fixes.
+"""
+
+import json
+import os
+from PhaseB_5 import read_one_HURDAT2_storm, is_accurate_direction
+from hurdat_columns import HURRICANE_WIND, new_columns, append_row, fix_hours
+from track_geometry import gc_distance, gc_bearing, METERS_PER_NM
+from masked_columns import quadrant_argmax
+from cyclone_energy import fix_energy
+
+
+def open_live_store(log_path: str) -> dict:
+    """Open a live store, replaying its write-ahead log if there is one.
+    :param log_path: path of the write-ahead log
+    :return: dictionary with 'storms' (id: columnar dataset of one storm),
+     'summary' (id: per-storm aggregates), 'years' (year: [storms, hurricanes]),
+     'quadrant' ([accurate, cases] over all storms) and the open 'log'
+    """
+    store = {'storms': {}, 'summary': {}, 'years': {}, 'quadrant': [0, 0], 'log': None}
+    if os.path.exists(log_path):
+        with open(log_path, 'rb') as f:
+            data = f.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        for line in complete.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            _apply_fix(store, entry['id'], entry['name'], entry['row'])
+        if len(complete) < len(data):
+            # drop a torn last write; its fix was never applied
+            with open(log_path, 'r+b') as f:
+                f.truncate(len(complete))
+    store['log'] = open(log_path, 'a')
+    return store
+
+
+def close_live_store(store: dict):
+    """Close the write-ahead log of a live store."""
+    store['log'].close()
+
+
+def _new_storm(store: dict, storm_id: str, name: str) -> dict:
+    """Start the dataset and aggregates of a storm the store has not seen."""
+    columns = new_columns()
+    columns['id'].append(storm_id)
+    columns['name'].append(name)
+    columns['basin'].append(storm_id[:2])
+    columns['year'].append(int(storm_id[-4:]))
+    columns['offsets'].append(0)
+    store['storms'][storm_id] = columns
+    store['summary'][storm_id] = {'name': name, 'max_wind': -999, 'ace': 0.0, 'pdi': 0.0, 'hurricane_days': 0.0,
+                                  'landfalls': 0, 'accurate': 0, 'cases': 0}
+    year = storm_id[-4:]
+    if year not in store['years']:
+        store['years'][year] = [0, 0]
+    store['years'][year][0] += 1
+    return columns
+
+
+def _apply_fix(store: dict, storm_id: str, name: str, row: list) -> bool:
+    """Append one fix to its storm and update the aggregates.
+    :return: False if the fix is not newer than the storm's last fix, so replays are harmless
+    """
+    columns = store['storms'].get(storm_id)
+    if columns is None:
+        columns = _new_storm(store, storm_id, name)
+    elif fix_hours(row[0], row[1]) <= columns['hours'][-1]:
+        return False
+    summary = store['summary'][storm_id]
+    summary['name'] = name
+    columns['name'][0] = name
+
+    append_row(columns, row)
+    columns['offsets'][-1] = len(columns['hours'])
+    i = len(columns['hours']) - 1
+    lat = columns['lat']
+    lon = columns['lon']
+    if i == 0:
+        columns['speed'].append(0.0)
+        columns['heading'].append(0.0)
+        columns['distance'].append(0.0)
+    else:
+        # the previous fix repeated its arriving segment; it now has a leaving one:
+        nm = gc_distance(lat[i - 1], lon[i - 1], lat[i], lon[i]) / METERS_PER_NM
+        elapsed = columns['hours'][i] - columns['hours'][i - 1]
+        columns['speed'][i - 1] = nm / elapsed
+        columns['heading'][i - 1] = gc_bearing(lat[i - 1], lon[i - 1], lat[i], lon[i])
+        columns['speed'].append(columns['speed'][i - 1])
+        columns['heading'].append(columns['heading'][i - 1])
+        columns['distance'].append(columns['distance'][i - 1] + nm)
+
+        # and it becomes a case of the quadrant test:
+        quadrants = quadrant_argmax(columns, i - 1)
+        if quadrants != [99]:
+            accurate = is_accurate_direction(quadrants, columns['heading'][i - 1])
+            summary['cases'] += 1
+            summary['accurate'] += accurate
+            store['quadrant'][0] += accurate
+            store['quadrant'][1] += 1
+
+    wind = columns['wind'][i]
+    if wind > summary['max_wind']:
+        if wind >= HURRICANE_WIND > summary['max_wind']:
+            store['years'][storm_id[-4:]][1] += 1
+        summary['max_wind'] = wind
+    ace, pdi, days = fix_energy(columns['status'][i], columns['time'][i], wind)
+    summary['ace'] += ace
+    summary['pdi'] += pdi
+    summary['hurricane_days'] += days
+    summary['landfalls'] += columns['record'][i] == 'L'
+    return True
+
+
+def add_fix(store: dict, storm_id: str, name: str, row: list) -> bool:
+    """Log and apply one advisory fix.
+    :param store: store from open_live_store
+    :param storm_id: storm id like 'EP142016'
+    :param name: storm name
+    :param row: one HURDAT2 data row, as read by read_one_HURDAT2_storm
+    :return: True if the fix was new
+    """
+    columns = store['storms'].get(storm_id)
+    if columns is not None and fix_hours(row[0], row[1]) <= columns['hours'][-1]:
+        return False
+    store['log'].write(json.dumps({'id': storm_id, 'name': name, 'row': row}) + '\n')
+    store['log'].flush()
+    os.fsync(store['log'].fileno())
+    return _apply_fix(store, storm_id, name, row)
+
+
+def poll_drop_directory(store: dict, directory: str) -> int:
+    """Ingest every HURDAT2 file dropped in a directory, oldest name first,
+    renaming each to '<name>.done' once its fixes are in the store.
+    :param store: store from open_live_store
+    :param directory: drop directory of the feed
+    :return: number of new fixes
+    """
+    added = 0
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.done'):
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, 'r') as f:
+            while True:
+                s = read_one_HURDAT2_storm(f)
+                if s is None:
+                    break  # hit end of file
+                for r in s['rows']:
+                    added += add_fix(store, s['id'], s['name'], r)
+        os.rename(path, path + '.done')
+    return added
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    store = open_live_store('live_store.log')
+    if not os.path.isdir('advisories'):
+        os.mkdir('advisories')
+    print('new fixes:', poll_drop_directory(store, 'advisories'))
+    for storm_id, summary in store['summary'].items():
+        print(storm_id, summary['name'], 'fixes:', len(store['storms'][storm_id]['hours']),
+              'max wind:', summary['max_wind'], 'ACE: {:.2f}'.format(summary['ace']))
+    for y in store['years']:
+        print('year', y, 'has', store['years'][y][0], 'storms and', store['years'][y][1], 'hurricanes.')
+    accurate, cases = store['quadrant']
+    if cases:
+        print('The accuracy of this hypothesis is ', accurate / cases)
+    close_live_store(store)
+
+
+if __name__ == '__main__':
+    main()
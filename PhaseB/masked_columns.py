@@ -0,0 +1,89 @@
+"""
+Reductions over the -999 sentinel columns of a columnar dataset that skip
+missing values through the validity masks built by the loader, instead of
+testing for -999 row by row.
+"""
+
+from itertools import compress
+from hurdat_columns import MISSING, RADII_COLUMNS, read_HURDAT2_columns, storm_slices, validity_mask
+from segmented import argmax_all
+
+
+# radii tiers in the order the quadrant test tries them, as column offsets into RADII_COLUMNS
+QUADRANT_TIERS = [8, 4, 0]  # 64, 50 then 34 kt
+
+
+def mask_of(columns: dict, name: str) -> bytearray:
+    """Return the validity mask of a column, building it if the dataset has none."""
+    mask = columns.get(name + '_valid')
+    if mask is None or len(mask) != len(columns[name]):
+        mask = columns[name + '_valid'] = validity_mask(columns[name])
+    return mask
+
+
+def valid_values(columns: dict, name: str, start: int = 0, end: int = None) -> list:
+    """Return the known values of a column between two rows."""
+    if end is None:
+        end = len(columns[name])
+    return list(compress(columns[name][start:end], mask_of(columns, name)[start:end]))
+
+
+def masked_max(columns: dict, name: str, start: int = 0, end: int = None):
+    """Return the largest known value of a column between two rows, or -999 if none is known."""
+    values = valid_values(columns, name, start, end)
+    return max(values) if values else MISSING
+
+
+def masked_min(columns: dict, name: str, start: int = 0, end: int = None):
+    """Return the smallest known value of a column between two rows, or -999 if none is known."""
+    values = valid_values(columns, name, start, end)
+    return min(values) if values else MISSING
+
+
+def masked_mean(columns: dict, name: str, start: int = 0, end: int = None):
+    """Return the mean of the known values of a column between two rows, or -999 if none is known."""
+    values = valid_values(columns, name, start, end)
+    return sum(values) / len(values) if values else MISSING
+
+
+def masked_count(columns: dict, name: str, start: int = 0, end: int = None) -> int:
+    """Return the number of known values of a column between two rows."""
+    if end is None:
+        end = len(columns[name])
+    return mask_of(columns, name)[start:end].count(1)
+
+
+def quadrant_argmax(columns: dict, i: int) -> list:
+    """Given a fix, return the indices of the quadrants with the largest wind
+    extent, the same way max_wind_quadrants of PhaseB_5 does: the 64 kt radii
+    are used unless all four are 0 or all four are unknown, then the 50 kt,
+    then the 34 kt ones. Like max_wind_quadrants, a tier mixing 0 and unknown
+    radii is used, and gives the quadrants of radius 0.
+    :param columns: columnar dataset
+    :param i: row of the fix
+    :return: the max quadrants' indices (0 NE, 1 SE, 2 SW, 3 NW), or [99] if no radii are known
+    """
+    for first in QUADRANT_TIERS:
+        names = RADII_COLUMNS[first:first + 4]
+        values = [columns[name][i] if mask_of(columns, name)[i] else MISSING for name in names]
+        if len(set(values)) > 1 or values[0] not in [0, MISSING]:
+            return argmax_all(values)
+    return [99]
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    for k, start, end in storm_slices(columns):
+        print(columns['id'][k], 'max wind:', masked_max(columns, 'wind', start, end),
+              'min pressure:', masked_min(columns, 'pressure', start, end),
+              'mean pressure: {:.1f}'.format(masked_mean(columns, 'pressure', start, end)),
+              'known pressures:', masked_count(columns, 'pressure', start, end), 'of', end - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Pressure-wind relationship of the minimum central pressure (column 7) and the
+maximum sustained wind (column 6), and gap filling of either column.
+
+For each basin and era, wind = a * (ENVIRONMENT_PRESSURE - pressure) ** b is
+fitted by least squares in log-log space over the fixes that have both
+values. Missing pressures or winds are then estimated from the other value
+into the 'pressure_filled' and 'wind_filled' columns, with a 'pw_flag'
+column recording which values are estimates. The derived columns can be
+cached in a file of the caller's choosing with the columnar exporter.
+"""
+
+import math
+import os
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from masked_columns import mask_of
+from columnar_export import fix_table, read_table, write_table
+
+
+ENVIRONMENT_PRESSURE = 1010
+
+# first years of the fitting eras; aircraft reconnaissance and then satellites
+# changed how both values were observed
+ERAS = [1851, 1945, 1970, 1990]
+
+# fits with fewer pairs fall back to the whole basin, then to every basin
+MIN_PAIRS = 30
+
+# pw_flag values
+OBSERVED = 0
+PRESSURE_ESTIMATED = 1
+WIND_ESTIMATED = 2
+UNKNOWN = 3
+
+FILLED_COLUMNS = ['pressure_filled', 'wind_filled', 'pw_flag']
+
+# source columns stored with the cache; it is only used while they all still match
+CACHE_KEY_COLUMNS = ['id', 'hours', 'wind', 'pressure']
+
+
+def era_of(year: int) -> int:
+    """Return the first year of the fitting era holding a year."""
+    era = ERAS[0]
+    for first in ERAS:
+        if year >= first:
+            era = first
+    return era
+
+
+def _deficit(pressure: int) -> float:
+    """Return the pressure deficit in hPa, at least 1 so the log stays defined."""
+    return max(1.0, ENVIRONMENT_PRESSURE - pressure)
+
+
+def fit_power_law(pairs: list) -> tuple:
+    """Given (wind, pressure) pairs, fit wind = a * deficit ** b by least
+    squares on log(wind) against log(deficit).
+    :param pairs: list of (wind, pressure) with both values known
+    :return: (a, b), or None with fewer than two distinct deficits
+    """
+    xs = [math.log(_deficit(p)) for w, p in pairs]
+    ys = [math.log(w) for w, p in pairs]
+    n = len(xs)
+    if n < 2:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return None
+    b = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    return math.exp(mean_y - b * mean_x), b
+
+
+def fit_pressure_wind(columns: dict) -> dict:
+    """Given a columnar dataset, fit the pressure-wind relationship per basin and era.
+    :param columns: columnar dataset
+    :return: dictionary of (basin, era): (a, b), plus (basin, None) basin-wide
+     and (None, None) overall fits
+    """
+    pairs = {}
+    wind = columns['wind']
+    pressure = columns['pressure']
+    known = [w and p for w, p in zip(mask_of(columns, 'wind'), mask_of(columns, 'pressure'))]
+    for k, start, end in storm_slices(columns):
+        key = (columns['basin'][k], era_of(columns['year'][k]))
+        for i in range(start, end):
+            if known[i] and wind[i] > 0:
+                for group in [key, (key[0], None), (None, None)]:
+                    pairs.setdefault(group, []).append((wind[i], pressure[i]))
+    fits = {}
+    for group in pairs:
+        if len(pairs[group]) >= MIN_PAIRS or group == (None, None):
+            fit = fit_power_law(pairs[group])
+            if fit is not None:
+                fits[group] = fit
+    return fits
+
+
+def _fit_for(fits: dict, basin: str, year: int) -> tuple:
+    """Return the most specific fit available for a storm."""
+    for group in [(basin, era_of(year)), (basin, None), (None, None)]:
+        if group in fits:
+            return fits[group]
+    return None
+
+
+def fill_pressure_wind(columns: dict, fits: dict = None) -> dict:
+    """Given a columnar dataset, add the 'pressure_filled', 'wind_filled' and
+    'pw_flag' columns: observed values are copied, and a missing pressure or
+    wind is estimated from the other value with the fit of its basin and era.
+    Fixes missing both keep -999 and are flagged UNKNOWN.
+    :param columns: columnar dataset, updated in place
+    :param fits: Optional. Fits from fit_pressure_wind; fitted on the dataset by default.
+    :return: the columnar dataset
+    """
+    if fits is None:
+        fits = fit_pressure_wind(columns)
+    wind = columns['wind']
+    pressure = columns['pressure']
+    wind_valid = mask_of(columns, 'wind')
+    pressure_valid = mask_of(columns, 'pressure')
+    pressure_filled = []
+    wind_filled = []
+    flag = []
+    for k, start, end in storm_slices(columns):
+        fit = _fit_for(fits, columns['basin'][k], columns['year'][k])
+        for i in range(start, end):
+            w = wind[i]
+            p = pressure[i]
+            f = OBSERVED
+            if fit is not None and wind_valid[i] and not pressure_valid[i] and w > 0:
+                p = int(round(ENVIRONMENT_PRESSURE - (w / fit[0]) ** (1.0 / fit[1])))
+                f = PRESSURE_ESTIMATED
+            elif fit is not None and pressure_valid[i] and not wind_valid[i]:
+                w = int(round(fit[0] * _deficit(p) ** fit[1]))
+                f = WIND_ESTIMATED
+            elif not wind_valid[i] and not pressure_valid[i]:
+                f = UNKNOWN
+            pressure_filled.append(p)
+            wind_filled.append(w)
+            flag.append(f)
+    columns['pressure_filled'] = pressure_filled
+    columns['wind_filled'] = wind_filled
+    columns['pw_flag'] = flag
+    return columns
+
+
+def load_filled_columns(columns: dict, cache: str) -> dict:
+    """Given a columnar dataset, add the filled pressure-wind columns from a
+    cache file, or compute them and write the cache. The cache keeps the
+    storm id, time, wind and pressure of every fix, so a cache of another
+    dataset, or of a revision of the same one, is recomputed.
+    :param columns: columnar dataset, updated in place
+    :param cache: path of the cache file, written with write_table
+    :return: the columnar dataset
+    """
+    key = {'id': fix_table(columns)['id']}
+    for name in CACHE_KEY_COLUMNS[1:]:
+        key[name] = columns[name]
+    if os.path.exists(cache):
+        table = read_table(cache)
+        if all(table.get(name) == key[name] for name in CACHE_KEY_COLUMNS):
+            for name in FILLED_COLUMNS:
+                columns[name] = table[name]
+            return columns
+    fill_pressure_wind(columns)
+    table = dict(key)
+    for name in FILLED_COLUMNS:
+        table[name] = columns[name]
+    write_table(table, cache)
+    return columns
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    fits = fit_pressure_wind(columns)
+    for basin, era in sorted(fits, key=lambda g: (g[0] or '', g[1] or 0)):
+        a, b = fits[(basin, era)]
+        print('basin', basin or 'all', 'era', era or 'all', 'wind = {:.2f} * (1010 - p) ^ {:.3f}'.format(a, b))
+    load_filled_columns(columns, 'pressure_wind_cache.hcol')
+    flags = columns['pw_flag']
+    print('pressures estimated:', flags.count(PRESSURE_ESTIMATED), 'winds estimated:', flags.count(WIND_ESTIMATED),
+          'unknown:', flags.count(UNKNOWN), 'of', len(flags), 'fixes')
+
+
+if __name__ == '__main__':
+    main()
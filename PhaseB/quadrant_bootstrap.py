@@ -0,0 +1,184 @@
+"""
+Uncertainty for the quadrant hypothesis of PhaseB_5: that the quadrant with the
+highest winds lies 45-90 degrees clockwise of the storm's direction of motion.
+
+Every valid case (a fix with known radii followed by another fix) is computed
+once. Confidence intervals come from a block bootstrap that resamples whole
+storms; the p-value comes from a null where each case's bearing is replaced by
+a uniformly random one.
+"""
+
+import random
+from PhaseB_5 import is_accurate_direction
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from masked_columns import quadrant_argmax
+from worker_pool import worker_map
+
+
+def quadrant_cases(columns: dict) -> dict:
+    """Given a columnar dataset, return every valid case of the quadrant test,
+    following dir_accurate_case of PhaseB_5. The headings are spherical rather
+    than ellipsoidal, so a bearing right at a quadrant edge can be judged
+    differently: on the NEPAC file 3306 of 3837 cases are accurate, against 3305.
+    :param columns: columnar dataset
+    :return: dictionary of aligned lists 'storm' (storm index), 'quadrants' and 'accurate'
+    """
+    cases = {'storm': [], 'quadrants': [], 'accurate': []}
+    heading = columns['heading']
+    for k, start, end in storm_slices(columns):
+        for i in range(start, end - 1):
+            quadrants = quadrant_argmax(columns, i)
+            if quadrants == [99]:
+                continue
+            cases['storm'].append(k)
+            cases['quadrants'].append(quadrants)
+            cases['accurate'].append(is_accurate_direction(quadrants, heading[i]))
+    return cases
+
+
+def storm_pairs(cases: dict) -> tuple:
+    """Given the quadrant cases, return the (accurate, case) count of every
+    storm that has at least one case.
+    :param cases: cases from quadrant_cases
+    :return: list of accurate counts, list of case counts
+    """
+    counts = {}
+    for k, accurate in zip(cases['storm'], cases['accurate']):
+        if k not in counts:
+            counts[k] = [0, 0]
+        counts[k][0] += accurate
+        counts[k][1] += 1
+    return [counts[k][0] for k in counts], [counts[k][1] for k in counts]
+
+
+def _bootstrap_chunk(task):
+    """Pool worker: accuracy ratios of a chunk of storm-block bootstrap replicates."""
+    accurate, case, replicates, seed = task
+    rng = random.Random(seed)
+    storms = range(len(case))
+    ratios = []
+    for r in range(replicates):
+        sample = rng.choices(storms, k=len(case))
+        ratios.append(sum([accurate[s] for s in sample]) / sum([case[s] for s in sample]))
+    return ratios
+
+
+def hit_probability(quadrants: list) -> float:
+    """Given the max wind quadrants of a case, return the probability that a
+    uniformly random bearing passes is_accurate_direction. The test only
+    changes at multiples of 45 degrees, so the midpoints of a tenth-degree
+    grid measure it exactly.
+    :param quadrants: the max quadrants' indices
+    :return: probability between 0 and 1
+    """
+    return sum(1 for d in range(3600) if is_accurate_direction(quadrants, d / 10.0 + 0.05)) / 3600.0
+
+
+def _null_chunk(task):
+    """Pool worker: accuracy ratios of a chunk of random-bearing replicates.
+    Cases are grouped by their hit probability, which only depends on the set
+    of max quadrants, so each replicate is one Bernoulli draw per case."""
+    groups, total, replicates, seed = task
+    rng = random.Random(seed)
+    ratios = []
+    for r in range(replicates):
+        hits = 0
+        for probability, count in groups:
+            hits += sum([rng.random() < probability for c in range(count)])
+        ratios.append(hits / total)
+    return ratios
+
+
+def _run_chunks(worker, make_task, replicates: int, seed: int, processes: int, chunk_size: int) -> list:
+    """Split replicates into seeded chunks and run them inline or in a process
+    pool. Each chunk gets seed + chunk number, so results do not depend on the
+    number of processes."""
+    tasks = []
+    for n, first in enumerate(range(0, replicates, chunk_size)):
+        tasks.append(make_task(min(chunk_size, replicates - first), seed + n))
+    with worker_map(worker, tasks, processes) as results:
+        return [ratio for chunk in results for ratio in chunk]
+
+
+def bootstrap_ratios(accurate: list, case: list, replicates: int = 10000, seed: int = 590,
+                     processes: int = None, chunk_size: int = 1000) -> list:
+    """Given per-storm (accurate, case) counts, return the accuracy ratio of
+    each block-bootstrap replicate, resampling storms with replacement.
+    :param accurate: accurate count of every storm
+    :param case: case count of every storm
+    :param replicates: number of replicates
+    :param seed: random seed
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :param chunk_size: replicates per task
+    :return: list of replicate ratios
+    """
+    return _run_chunks(_bootstrap_chunk, lambda count, s: (accurate, case, count, s),
+                       replicates, seed, processes, chunk_size)
+
+
+def null_ratios(cases: dict, replicates: int = 10000, seed: int = 590,
+                processes: int = None, chunk_size: int = 1000) -> list:
+    """Given the quadrant cases, return the accuracy ratio of each replicate
+    under the null hypothesis that the direction of motion is random.
+    :param cases: cases from quadrant_cases
+    :param replicates: number of replicates
+    :param seed: random seed
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :param chunk_size: replicates per task
+    :return: list of replicate ratios
+    """
+    groups = {}
+    for quadrants in cases['quadrants']:
+        key = tuple(quadrants)
+        groups[key] = groups.get(key, 0) + 1
+    groups = [(hit_probability(list(key)), groups[key]) for key in sorted(groups)]
+    total = len(cases['quadrants'])
+    return _run_chunks(_null_chunk, lambda count, s: (groups, total, count, s),
+                       replicates, seed, processes, chunk_size)
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Given sorted values, return the percentile at a fraction between 0 and
+    1, interpolating linearly between the two nearest ranks."""
+    position = fraction * (len(ordered) - 1)
+    below = int(position)
+    above = min(below + 1, len(ordered) - 1)
+    return ordered[below] + (position - below) * (ordered[above] - ordered[below])
+
+
+def percentile_interval(ratios: list, level: float = 0.95) -> tuple:
+    """Given replicate ratios, return the percentile confidence interval, both
+    bounds taken by the same interpolation rule.
+    :param ratios: list of replicate ratios
+    :param level: confidence level
+    :return: lower and upper bound
+    """
+    ordered = sorted(ratios)
+    tail = (1.0 - level) / 2.0
+    return percentile(ordered, tail), percentile(ordered, 1.0 - tail)
+
+
+def p_value(observed: float, null: list) -> float:
+    """Given an observed ratio and null replicate ratios, return the one-sided
+    p-value of seeing a ratio at least as high by chance."""
+    return (1 + sum(1 for ratio in null if ratio >= observed)) / (len(null) + 1)
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    cases = quadrant_cases(read_HURDAT2_columns(filename))
+    accurate, case = storm_pairs(cases)
+    observed = sum(accurate) / sum(case)
+    low, high = percentile_interval(bootstrap_ratios(accurate, case))
+    null = null_ratios(cases)
+    print('The accuracy of this hypothesis is ', observed)
+    print('95% confidence interval: {:.4f} - {:.4f}'.format(low, high))
+    print('random-bearing null mean: {:.4f}, p-value: {:.5f}'.format(sum(null) / len(null), p_value(observed, null)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Rapid-intensification (RI) and rapid-weakening (RW) detection over the
+maximum sustained wind column (column 6) of every storm.
+"""
+
+from hurdat_columns import read_HURDAT2_columns, storm_slices, hours_to_datetime
+
+
+def wind_changes(hours: list, wind: list, start: int, end: int, window: float = 24.0) -> list:
+    """Given the fix times and winds of one storm, return the wind change over
+    the preceding `window` hours at every fix. Fixes are irregularly spaced, so
+    the wind `window` hours earlier is linearly interpolated between the two
+    fixes around that time. A single trailing pointer walks the storm once,
+    which keeps this O(n) per storm instead of a pairwise scan.
+    :param hours: fix times in hours, ascending within a storm
+    :param wind: maximum sustained winds in knots, -999 when missing
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param window: length of the look-back window in hours
+    :return: list of (row, change, wind at window start), one per fix with enough history
+    """
+    changes = []
+    i = start
+    for j in range(start, end):
+        target = hours[j] - window
+        if target < hours[start] or wind[j] < 0:
+            continue
+        # advance the trailing pointer to the fix at or just before target:
+        while i + 1 < j and hours[i + 1] <= target:
+            i += 1
+        if wind[i] < 0 or wind[i + 1] < 0:
+            continue
+        span = hours[i + 1] - hours[i]
+        if span == 0:
+            earlier = wind[i + 1]
+        else:
+            earlier = wind[i] + (wind[i + 1] - wind[i]) * (target - hours[i]) / span
+        changes.append((j, wind[j] - earlier, earlier))
+    return changes
+
+
+def storm_episodes(columns: dict, k: int, start: int, end: int,
+                   threshold: int = 30, weakening_threshold: int = 30, window: float = 24.0) -> list:
+    """Given one storm of a columnar dataset, return its RI and RW episodes.
+    Consecutive fixes whose windowed change passes the threshold are merged
+    into one episode.
+    :param columns: columnar dataset
+    :param k: storm index
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param threshold: minimum increase in knots over the window for RI
+    :param weakening_threshold: minimum decrease in knots over the window for RW
+    :param window: length of the window in hours
+    :return: list of episode dictionaries
+    """
+    hours = columns['hours']
+    wind = columns['wind']
+    episodes = []
+    current = None
+    for j, change, earlier in wind_changes(hours, wind, start, end, window):
+        if change >= threshold:
+            kind = 'RI'
+        elif change <= -weakening_threshold:
+            kind = 'RW'
+        else:
+            kind = None
+
+        if current is not None and (kind != current['kind'] or j != current['last_row'] + 1):
+            episodes.append(current)
+            current = None
+        if kind is None:
+            continue
+        if current is None:
+            current = {'id': columns['id'][k], 'name': columns['name'][k], 'kind': kind,
+                       'start_hours': hours[j] - window, 'start_wind': earlier,
+                       'max_change': change, 'last_row': j}
+        elif abs(change) > abs(current['max_change']):
+            current['max_change'] = change
+        current['last_row'] = j
+        current['end_hours'] = hours[j]
+        current['end_wind'] = wind[j]
+    if current is not None:
+        episodes.append(current)
+
+    for e in episodes:
+        e['start'] = hours_to_datetime(e['start_hours'])
+        e['end'] = hours_to_datetime(e['end_hours'])
+        del e['last_row']
+    return episodes
+
+
+def find_intensity_episodes(columns: dict, threshold: int = 30, weakening_threshold: int = 30,
+                            window: float = 24.0) -> list:
+    """Given a columnar dataset, return the RI and RW episodes of every storm.
+    :param columns: columnar dataset
+    :param threshold: minimum increase in knots over the window for RI
+    :param weakening_threshold: minimum decrease in knots over the window for RW
+    :param window: length of the window in hours
+    :return: list of episode dictionaries, in storm order
+    """
+    episodes = []
+    for k, start, end in storm_slices(columns):
+        episodes.extend(storm_episodes(columns, k, start, end, threshold, weakening_threshold, window))
+    return episodes
+
+
+def count_episodes_by_year(episodes: list) -> dict:
+    """Given a list of episodes, return the RI and RW counts per storm year.
+    :param episodes: episodes from find_intensity_episodes
+    :return: dictionary of year: [RI episodes, RW episodes]
+    """
+    year = {}
+    for e in episodes:
+        y = e['id'][-4:]
+        if y not in year:
+            year[y] = [0, 0]
+        year[y][0 if e['kind'] == 'RI' else 1] += 1
+    return year
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    episodes = find_intensity_episodes(columns)
+    for e in episodes:
+        print(e['id'], e['name'], e['kind'], 'from', e['start'], 'to', e['end'],
+              'max 24h change: {:.1f} kt'.format(e['max_change']))
+
+    year = count_episodes_by_year(episodes)
+    for y in year:
+        print('year', y, 'has', year[y][0], 'RI episodes and', year[y][1], 'RW episodes.')
+
+
+if __name__ == '__main__':
+    main()
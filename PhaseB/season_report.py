@@ -0,0 +1,195 @@
+"""
+Season, decade and era comparison reports.
+
+A report is any set of per-storm aggregates (storm and hurricane counts,
+ACE, mean speed, landfalls, quadrant accuracy, ...) under any number of
+group-bys (year, decade, basin, genesis month, ...). Only the per-storm
+fields the report uses are computed, each over the whole dataset at once
+with the segmented reducers, and the storms are then scanned once: each
+storm's record updates the accumulators of all group-bys at once. Reports
+are written as CSV or HTML.
+"""
+
+import csv
+import html
+from hurdat_columns import HURRICANE_WIND, MISSING, read_HURDAT2_columns, storm_slices
+from cyclone_energy import storm_energy
+from quadrant_bootstrap import quadrant_cases
+from segmented import count_if, group_reduce, segment_reduce
+
+
+# name: (kind, record fields); kinds are 'count', 'sum', 'mean', 'max' and 'ratio' (sum / sum)
+AGGREGATES = {
+    'storms': ('count', []),
+    'hurricanes': ('sum', ['hurricane']),
+    'ace': ('sum', ['ace']),
+    'mean_ace': ('mean', ['ace']),
+    'max_wind': ('max', ['max_wind']),
+    'mean_speed': ('mean', ['mean_speed']),
+    'landfalls': ('sum', ['landfalls']),
+    'quadrant_accuracy': ('ratio', ['accurate', 'cases']),
+}
+
+DEFAULT_AGGREGATES = ['storms', 'hurricanes', 'ace', 'mean_speed', 'landfalls', 'quadrant_accuracy']
+
+RECORD_FIELDS = ['id', 'year', 'decade', 'basin', 'month', 'max_wind', 'hurricane', 'ace', 'mean_speed',
+                 'landfalls', 'accurate', 'cases']
+
+
+def storm_fields(columns: dict, names: list) -> dict:
+    """Given a columnar dataset, compute the named record fields of every storm,
+    each in one pass over the dataset. These are the fields the report engine
+    groups and aggregates.
+    :param columns: columnar dataset
+    :param names: field names from RECORD_FIELDS
+    :return: dictionary of field name: one value per storm
+    """
+    for name in names:
+        if name not in RECORD_FIELDS:
+            raise ValueError('Invalid report field {} given.'.format(name))
+    offsets = columns['offsets']
+    fields = {}
+    for name in ['id', 'year', 'basin']:
+        if name in names:
+            fields[name] = columns[name]
+    if 'decade' in names:
+        fields['decade'] = [year // 10 * 10 for year in columns['year']]
+    if 'month' in names:
+        fields['month'] = [int(date[4:6]) if date != MISSING else None
+                           for date in segment_reduce(columns['date'], offsets, 'first')]
+    if 'max_wind' in names or 'hurricane' in names:
+        max_wind = segment_reduce(columns['wind'], offsets, 'max', columns['wind_valid'])
+        fields['max_wind'] = max_wind
+        fields['hurricane'] = [1 if wind >= HURRICANE_WIND else 0 for wind in max_wind]
+    if 'ace' in names:
+        fields['ace'] = [sum(m[0] for m in storm_energy(columns, k, start, end).values())
+                         for k, start, end in storm_slices(columns)]
+    if 'mean_speed' in names:
+        start = segment_reduce(columns['hours'], offsets, 'first')
+        end = segment_reduce(columns['hours'], offsets, 'last')
+        distance = segment_reduce(columns['distance'], offsets, 'last')
+        fields['mean_speed'] = [distance[k] / (end[k] - start[k]) if end[k] != start[k] else 0.0
+                                for k in range(len(distance))]
+    if 'landfalls' in names:
+        fields['landfalls'] = count_if(columns['record'], offsets, lambda record: record == 'L')
+    if 'accurate' in names or 'cases' in names:
+        cases = quadrant_cases(columns)
+        accurate = group_reduce(cases['storm'], cases['accurate'], 'sum')
+        counts = group_reduce(cases['storm'], cases['accurate'], 'count')
+        fields['accurate'] = [accurate.get(k, 0) for k in range(len(offsets) - 1)]
+        fields['cases'] = [counts.get(k, 0) for k in range(len(offsets) - 1)]
+    return fields
+
+
+def _update(accumulator: list, kind: str, record: dict, fields: list):
+    """Fold one record into an aggregate's accumulator [first, second]."""
+    if kind == 'count':
+        accumulator[0] += 1
+    elif kind == 'max':
+        accumulator[0] = max(accumulator[0], record[fields[0]])
+    elif kind == 'ratio':
+        accumulator[0] += record[fields[0]]
+        accumulator[1] += record[fields[1]]
+    else:
+        accumulator[0] += record[fields[0]]
+        accumulator[1] += 1
+
+
+def _finish(accumulator: list, kind: str):
+    """Return the value of an aggregate from its accumulator."""
+    if kind in ['mean', 'ratio']:
+        return accumulator[0] / accumulator[1] if accumulator[1] else None
+    return accumulator[0]
+
+
+def build_report(columns: dict, group_bys: list, aggregates: list = None) -> dict:
+    """Given a columnar dataset, compute every aggregate under every group-by
+    in a single scan of the storms.
+    :param columns: columnar dataset
+    :param group_bys: list of group-bys, each a list of RECORD_FIELDS names like ['basin', 'decade']
+    :param aggregates: Optional. Names from AGGREGATES; DEFAULT_AGGREGATES by default.
+    :return: dictionary with 'aggregates' and 'tables', one per group-by:
+     {'group_by': fields, 'rows': [[key values..., aggregate values...]]} sorted by key
+    """
+    if aggregates is None:
+        aggregates = DEFAULT_AGGREGATES
+    kinds = [AGGREGATES[name] for name in aggregates]
+    names = sorted(set(field for fields in group_bys for field in fields) |
+                   set(field for kind, fields in kinds for field in fields))
+    values = storm_fields(columns, names)
+    groups = [{} for g in group_bys]
+    for k, start, end in storm_slices(columns):
+        if end == start:
+            continue
+        record = {name: values[name][k] for name in names}
+        for g, fields in enumerate(group_bys):
+            key = tuple(record[field] for field in fields)
+            if key not in groups[g]:
+                groups[g][key] = [[-999 if kind == 'max' else 0, 0] for kind, f in kinds]
+            for accumulator, (kind, f) in zip(groups[g][key], kinds):
+                _update(accumulator, kind, record, f)
+
+    tables = []
+    for fields, group in zip(group_bys, groups):
+        rows = []
+        for key in sorted(group):
+            rows.append(list(key) + [_finish(a, kind) for a, (kind, f) in zip(group[key], kinds)])
+        tables.append({'group_by': fields, 'rows': rows})
+    return {'aggregates': aggregates, 'tables': tables}
+
+
+def _format(value) -> str:
+    """Format one report cell."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return '{:.3f}'.format(value)
+    return str(value)
+
+
+def write_csv(report: dict, filename: str):
+    """Write a report as CSV, one block per group-by separated by a blank line."""
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for n, table in enumerate(report['tables']):
+            if n:
+                writer.writerow([])
+            writer.writerow(table['group_by'] + report['aggregates'])
+            for row in table['rows']:
+                writer.writerow([_format(value) for value in row])
+
+
+def write_html(report: dict, filename: str, title: str = 'Season report'):
+    """Write a report as a standalone HTML page, one table per group-by."""
+    lines = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>{}</title>'.format(html.escape(title)),
+             '<style>table {border-collapse: collapse; margin-bottom: 2em} '
+             'td, th {border: 1px solid #999; padding: 2px 8px; text-align: right}</style>',
+             '</head><body>', '<h1>{}</h1>'.format(html.escape(title))]
+    for table in report['tables']:
+        lines.append('<h2>By {}</h2>'.format(html.escape(', '.join(table['group_by']))))
+        lines.append('<table><tr>' + ''.join('<th>{}</th>'.format(html.escape(name))
+                                             for name in table['group_by'] + report['aggregates']) + '</tr>')
+        for row in table['rows']:
+            lines.append('<tr>' + ''.join('<td>{}</td>'.format(html.escape(_format(value))) for value in row) + '</tr>')
+        lines.append('</table>')
+    lines.append('</body></html>')
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    report = build_report(read_HURDAT2_columns(filename), [['decade'], ['basin', 'decade'], ['month'], ['year']])
+    write_csv(report, 'season_report.csv')
+    write_html(report, 'season_report.html')
+    for row in report['tables'][0]['rows']:
+        print(' '.join('{}={}'.format(name, _format(value))
+                       for name, value in zip(['decade'] + report['aggregates'], row)))
+
+
+if __name__ == '__main__':
+    main()
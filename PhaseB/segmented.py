@@ -0,0 +1,171 @@
+"""
+Segmented operations over a fix column of a columnar dataset, where the
+segments are the storms given by the offsets: argmax with ties, and a small
+reduction framework. Each segment is handed to its reducer as one list
+slice, so the per-storm work runs in builtins like sum and max rather than
+in a Python loop per fix.
+"""
+
+from functools import reduce
+from itertools import compress
+from hurdat_columns import HURRICANE_WIND, MISSING, hours_to_datetime, read_HURDAT2_columns
+
+
+# named reducers: kernel over a non-empty list of values, and the result of an empty segment
+REDUCERS = {
+    'sum': (sum, 0),
+    'count': (len, 0),
+    'min': (min, MISSING),
+    'max': (max, MISSING),
+    'mean': (lambda values: sum(values) / len(values), MISSING),
+    'first': (lambda values: values[0], MISSING),
+    'last': (lambda values: values[-1], MISSING),
+}
+
+
+def segment_argmax(values: list, offsets: list, valid: bytearray = None, largest: bool = True) -> dict:
+    """Given a fix column, return the extreme value of every segment and where
+    it occurs, in one pass over the column. Ties are kept, so the first and
+    last times at the extreme are both available.
+    :param values: one value per row
+    :param offsets: segment offsets; segment k is rows offsets[k]:offsets[k + 1]
+    :param valid: Optional. Validity mask; rows with 0 are skipped.
+    :param largest: True for the maximum, False for the minimum
+    :return: dictionary of aligned per-segment lists 'value' (-999 if the segment
+     has no valid row), 'first' and 'last' rows (None if no valid row) and 'ties'
+     (every row holding the value)
+    """
+    result = {'value': [], 'first': [], 'last': [], 'ties': []}
+    sign = 1 if largest else -1
+    for k in range(len(offsets) - 1):
+        best = None
+        ties = []
+        for i in range(offsets[k], offsets[k + 1]):
+            if valid is not None and not valid[i]:
+                continue
+            v = values[i]
+            if best is None or sign * (v - best) > 0:
+                best = v
+                ties = [i]
+            elif v == best:
+                ties.append(i)
+        result['value'].append(MISSING if best is None else best)
+        result['first'].append(ties[0] if ties else None)
+        result['last'].append(ties[-1] if ties else None)
+        result['ties'].append(ties)
+    return result
+
+
+def segment_argmin(values: list, offsets: list, valid: bytearray = None) -> dict:
+    """Like segment_argmax, for the minimum of every segment."""
+    return segment_argmax(values, offsets, valid, largest=False)
+
+
+def argmax_all(values: list) -> list:
+    """Return the positions of every occurrence of the largest value of a list."""
+    return segment_argmax(values, [0, len(values)])['ties'][0]
+
+
+def _reducer(op) -> tuple:
+    """Return the (kernel, empty result) of a reducer name or binary function."""
+    if callable(op):
+        return (lambda values: reduce(op, values)), MISSING
+    if op not in REDUCERS:
+        raise ValueError('Invalid reducer {} given.'.format(op))
+    return REDUCERS[op]
+
+
+def segment_reduce(values: list, offsets: list, op='sum', valid: bytearray = None) -> list:
+    """Given a fix column, reduce every segment to one value.
+    :param values: one value per row
+    :param offsets: segment offsets; segment k is rows offsets[k]:offsets[k + 1]
+    :param op: a REDUCERS name, 'argmax' or 'argmin' (first row at the extreme),
+     or a binary function folded over the segment like functools.reduce
+    :param valid: Optional. Validity mask; rows with 0 are left out.
+    :return: one result per segment; -999 (0 for 'sum' and 'count', None for
+     'argmax' and 'argmin') when a segment has no valid row
+    """
+    if op in ['argmax', 'argmin']:
+        return segment_argmax(values, offsets, valid, largest=op == 'argmax')['first']
+    kernel, empty = _reducer(op)
+    result = []
+    for k in range(len(offsets) - 1):
+        segment = values[offsets[k]:offsets[k + 1]]
+        if valid is not None:
+            segment = list(compress(segment, valid[offsets[k]:offsets[k + 1]]))
+        result.append(kernel(segment) if segment else empty)
+    return result
+
+
+def count_if(values: list, offsets: list, predicate, valid: bytearray = None) -> list:
+    """Return the number of rows of every segment whose value passes a predicate."""
+    return segment_reduce([1 if predicate(v) else 0 for v in values], offsets, 'sum', valid)
+
+
+def group_reduce(keys: list, values: list, op='sum', valid: bytearray = None) -> dict:
+    """Given a key per value, reduce the values of every key to one result.
+    Keys and values can be per fix (status, month) or per storm (year, basin),
+    so per-storm results of segment_reduce can be grouped again.
+    :param keys: grouping key of every value
+    :param values: values aligned with keys
+    :param op: a REDUCERS name or a binary function, see segment_reduce
+    :param valid: Optional. Validity mask; values with 0 are left out.
+    :return: dictionary of key: result, in order of first appearance
+    """
+    kernel, empty = _reducer(op)
+    groups = {}
+    for i, key in enumerate(keys):
+        if valid is None or valid[i]:
+            groups.setdefault(key, []).append(values[i])
+        else:
+            groups.setdefault(key, [])
+    return {key: kernel(group) if group else empty for key, group in groups.items()}
+
+
+def max_wind_times(columns: dict) -> dict:
+    """Given a columnar dataset, return the highest wind of every storm with
+    the first and last times it was reached, replacing a strptime per row.
+    :param columns: columnar dataset
+    :return: dictionary of storm id: (max wind, first datetime, last datetime)
+    """
+    result = segment_argmax(columns['wind'], columns['offsets'], columns.get('wind_valid'))
+    hours = columns['hours']
+    times = {}
+    for k, storm_id in enumerate(columns['id']):
+        first = result['first'][k]
+        if first is None:
+            times[storm_id] = (MISSING, None, None)
+        else:
+            times[storm_id] = (result['value'][k], hours_to_datetime(hours[first]),
+                               hours_to_datetime(hours[result['last'][k]]))
+    return times
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    offsets = columns['offsets']
+    times = max_wind_times(columns)
+    pressure = segment_argmin(columns['pressure'], offsets, columns['pressure_valid'])
+    landfalls = count_if(columns['record'], offsets, lambda record: record == 'L')
+    for k, storm_id in enumerate(columns['id']):
+        wind, first, last = times[storm_id]
+        print(storm_id, 'highest wind:', wind, 'first occurs at:', first, 'last at:', last,
+              'lowest pressure:', pressure['value'][k], 'landfalls:', landfalls[k])
+
+    max_wind = segment_reduce(columns['wind'], offsets, 'max', columns['wind_valid'])
+    storms = group_reduce(columns['year'], max_wind, 'count')
+    hurricanes = group_reduce(columns['year'], [1 if w >= HURRICANE_WIND else 0 for w in max_wind], 'sum')
+    for y in storms:
+        print('year', y, 'has', storms[y], 'storms and', hurricanes[y], 'hurricanes.')
+    mean_wind = group_reduce(columns['status'], columns['wind'], 'mean', columns['wind_valid'])
+    for status in sorted(mean_wind):
+        print('status', status, 'mean wind: {:.1f} kt'.format(mean_wind[status]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Run-length encoding of the system status (column 3) and Saffir-Simpson
+category of every storm, with transition matrices, time spent in each state
+and extratropical-transition timing, aggregated by basin and decade.
+
+Runs are found in one pass over the whole columnar dataset: a run ends where
+the value changes or a storm ends, so no per-storm loop is needed.
+"""
+
+from hurdat_columns import HURRICANE_WIND, read_HURDAT2_columns
+
+
+# upper bounds (exclusive) of the Saffir-Simpson categories, in knots
+CATEGORY_BOUNDS = [(34, 'TD'), (HURRICANE_WIND, 'TS'), (83, '1'), (96, '2'), (113, '3'), (137, '4')]
+
+TROPICAL_STATUS = {'TD', 'TS', 'HU', 'SD', 'SS'}
+
+
+def saffir_simpson(wind: int) -> str:
+    """Given a maximum sustained wind in knots, return its Saffir-Simpson
+    category: 'TD', 'TS', '1' to '5', or '' when the wind is missing."""
+    if wind < 0:
+        return ''
+    for bound, category in CATEGORY_BOUNDS:
+        if wind < bound:
+            return category
+    return '5'
+
+
+def category_column(columns: dict) -> list:
+    """Given a columnar dataset, return the Saffir-Simpson category of every fix."""
+    return [saffir_simpson(w) for w in columns['wind']]
+
+
+def run_length_encode(values: list, offsets: list) -> dict:
+    """Given a fix column and the storm offsets, return its runs: maximal
+    stretches of equal consecutive values within one storm.
+    :param values: one value per fix
+    :param offsets: storm offsets of the columnar dataset
+    :return: dictionary of aligned lists 'storm' (storm index), 'start' (first row),
+     'end' (one past the last row) and 'value'
+    """
+    runs = {'storm': [], 'start': [], 'end': [], 'value': []}
+    k = 0
+    while k + 1 < len(offsets) - 1 and offsets[k + 1] == 0:
+        k += 1  # skip leading storms without fixes
+    start = 0
+    for i in range(1, len(values) + 1):
+        # offsets[k + 1] is the first row of the next storm, so it always ends a run:
+        boundary = i == offsets[k + 1]
+        if boundary or values[i] != values[start]:
+            runs['storm'].append(k)
+            runs['start'].append(start)
+            runs['end'].append(i)
+            runs['value'].append(values[start])
+            start = i
+        while k + 1 < len(offsets) - 1 and i == offsets[k + 1]:
+            k += 1  # also steps over storms without fixes
+    return runs
+
+
+def group_of(columns: dict, k: int) -> tuple:
+    """Return the (basin, decade) aggregation key of storm k."""
+    return columns['basin'][k], columns['year'][k] // 10 * 10
+
+
+def transition_statistics(columns: dict, runs: dict) -> dict:
+    """Given a columnar dataset and the runs of one of its fix columns, return
+    per (basin, decade) aggregates:
+    'transitions' - {(from, to): count} between consecutive runs of a storm,
+    'hours' - {state: hours spent in the state}, a run lasting until the next run starts,
+    'runs' - {state: number of runs}.
+    :param columns: columnar dataset
+    :param runs: runs from run_length_encode
+    :return: dictionary of (basin, decade): aggregates
+    """
+    hours = columns['hours']
+    offsets = columns['offsets']
+    groups = {}
+    storm = runs['storm']
+    value = runs['value']
+    for n in range(len(storm)):
+        k = storm[n]
+        key = group_of(columns, k)
+        if key not in groups:
+            groups[key] = {'transitions': {}, 'hours': {}, 'runs': {}}
+        group = groups[key]
+        state = value[n]
+        last = n + 1 == len(storm) or storm[n + 1] != k
+        end = offsets[k + 1] - 1 if last else runs['start'][n + 1]
+        group['hours'][state] = group['hours'].get(state, 0.0) + hours[end] - hours[runs['start'][n]]
+        group['runs'][state] = group['runs'].get(state, 0) + 1
+        if not last:
+            pair = (state, value[n + 1])
+            group['transitions'][pair] = group['transitions'].get(pair, 0) + 1
+    return groups
+
+
+def transition_matrix(transitions: dict) -> tuple:
+    """Given transition counts, return the row-normalized transition matrix.
+    :param transitions: {(from, to): count}, from transition_statistics
+    :return: sorted list of states, and matrix[from][to] probabilities as nested lists
+    """
+    states = sorted(set(s for pair in transitions for s in pair))
+    matrix = []
+    for a in states:
+        total = sum(transitions.get((a, b), 0) for b in states)
+        matrix.append([transitions.get((a, b), 0) / total if total else 0.0 for b in states])
+    return states, matrix
+
+
+def extratropical_transitions(columns: dict, runs: dict) -> list:
+    """Given a columnar dataset and its status runs, return the first
+    extratropical transition of every storm: the first 'EX' run that follows a
+    tropical or subtropical one.
+    :param columns: columnar dataset
+    :param runs: runs of the status column
+    :return: list of dictionaries with 'id', 'basin', 'decade', 'row', 'hours'
+     (since the storm's first tropical fix), 'lat', 'lon' and 'wind' at transition
+    """
+    events = []
+    storm = runs['storm']
+    for n in range(len(storm)):
+        k = storm[n]
+        if n == 0 or storm[n - 1] != k:
+            tropical_since = None  # new storm
+            done = False
+        if done:
+            continue
+        if tropical_since is None and runs['value'][n] in TROPICAL_STATUS:
+            tropical_since = columns['hours'][runs['start'][n]]
+        elif tropical_since is not None and runs['value'][n] == 'EX':
+            i = runs['start'][n]
+            basin, decade = group_of(columns, k)
+            events.append({'id': columns['id'][k], 'basin': basin, 'decade': decade, 'row': i,
+                           'hours': columns['hours'][i] - tropical_since,
+                           'lat': columns['lat'][i], 'lon': columns['lon'][i], 'wind': columns['wind'][i]})
+            done = True  # only the first transition of a storm counts
+    return events
+
+
+def transition_timing(events: list) -> dict:
+    """Given extratropical transitions, return per (basin, decade) the count,
+    mean hours after genesis and mean latitude of transition."""
+    groups = {}
+    for e in events:
+        key = (e['basin'], e['decade'])
+        if key not in groups:
+            groups[key] = [0, 0.0, 0.0]
+        groups[key][0] += 1
+        groups[key][1] += e['hours']
+        groups[key][2] += e['lat']
+    return {key: {'count': g[0], 'mean_hours': g[1] / g[0], 'mean_lat': g[2] / g[0]} for key, g in groups.items()}
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    status_runs = run_length_encode(columns['status'], columns['offsets'])
+    category_runs = run_length_encode(category_column(columns), columns['offsets'])
+    status = transition_statistics(columns, status_runs)
+    category = transition_statistics(columns, category_runs)
+    timing = transition_timing(extratropical_transitions(columns, status_runs))
+    for key in sorted(status):
+        print('============================')
+        print('basin {} decade {}s'.format(*key))
+        states, matrix = transition_matrix(status[key]['transitions'])
+        print('status transitions:', ' '.join('{:>5}'.format(s) for s in states))
+        for s, row in zip(states, matrix):
+            print('{:>19}'.format(s), ' '.join('{:5.2f}'.format(p) for p in row))
+        print('days by status:', ', '.join('{} {:.1f}'.format(s, h / 24.0)
+                                           for s, h in sorted(status[key]['hours'].items())))
+        print('days by category:', ', '.join('{} {:.1f}'.format(s or '?', h / 24.0)
+                                             for s, h in sorted(category[key]['hours'].items())))
+        if key in timing:
+            print('extratropical transitions: {count}, mean {mean_hours:.0f} h after genesis '
+                  'at {mean_lat:.1f} deg'.format(**timing[key]))
+
+
+if __name__ == '__main__':
+    main()
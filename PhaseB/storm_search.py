@@ -0,0 +1,213 @@
+"""
+Search index over the storms of a HURDAT2 file by name, id, year and basin,
+with exact, prefix and fuzzy (edit distance) matching, so a query like
+'KATRINA 2005' or 'katrna' finds the storm's ATCF id.
+
+Names and ids are kept in one sorted key list, so prefix lookups are a
+bisect, and fuzzy matches are looked up through a trigram index before the
+edit distance is computed. The index is built from the header lines only
+and kept in memory, or cached as JSON in a file the caller names.
+"""
+
+import bisect
+import json
+import os
+import re
+
+
+BASINS = {'AL', 'EP', 'CP'}
+
+ID_PATTERN = re.compile(r'^[A-Z]{2}\d{6}$')
+
+
+def read_headers(filename: str) -> list:
+    """Return the (id, name, num_rows) of every storm of a HURDAT2 file, skipping the data rows."""
+    headers = []
+    with open(filename, 'r') as f:
+        while True:
+            header = f.readline()
+            if header == '':
+                break  # hit end of file
+            fields = [field.strip() for field in header.split(',')]
+            headers.append((fields[0], fields[1], int(fields[2])))
+            for r in range(int(fields[2])):
+                f.readline()
+    return headers
+
+
+def trigrams(word: str) -> set:
+    """Return the trigrams of a word, padded so short words still have some."""
+    padded = '  ' + word + ' '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_search_index(filename: str) -> dict:
+    """Build the search index of a HURDAT2 file.
+    :param filename: path of a HURDAT2 file
+    :return: dictionary with 'storms' (list of {id, name, year, basin}), 'keys'
+     (sorted [key, storm] pairs of lower-case names and ids) and 'trigrams'
+     (trigram: sorted list of lower-case names)
+    """
+    index = {'storms': [], 'keys': [], 'trigrams': {}}
+    names = set()
+    for n, (storm_id, name, num_rows) in enumerate(read_headers(filename)):
+        index['storms'].append({'id': storm_id, 'name': name, 'year': int(storm_id[-4:]), 'basin': storm_id[:2]})
+        index['keys'].append([storm_id.lower(), n])
+        if name != 'UNNAMED':
+            index['keys'].append([name.lower(), n])
+            names.add(name.lower())
+    index['keys'].sort()
+    for name in sorted(names):
+        for gram in trigrams(name):
+            index['trigrams'].setdefault(gram, []).append(name)
+    return index
+
+
+def load_search_index(filename: str, cache: str = None) -> dict:
+    """Return the search index of a HURDAT2 file. With a cache, the index is
+    read from it when it was built from the file as it is now, else built and
+    written to it.
+    :param filename: path of a HURDAT2 file
+    :param cache: Optional. Path of a JSON cache; None builds the index in memory only.
+    :return: search index, see build_search_index
+    """
+    if cache is None:
+        return build_search_index(filename)
+    stat = os.stat(filename)
+    source = [os.path.basename(filename), stat.st_size, stat.st_mtime]
+    if os.path.exists(cache):
+        with open(cache, 'r') as f:
+            index = json.load(f)
+        if index.get('source') == source:
+            return index
+    index = build_search_index(filename)
+    index['source'] = source
+    with open(cache, 'w') as f:
+        json.dump(index, f)
+    return index
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Return the Levenshtein distance between two strings."""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def prefix_matches(index: dict, prefix: str) -> list:
+    """Return the [key, storm] pairs whose key starts with a lower-case prefix."""
+    keys = index['keys']
+    first = bisect.bisect_left(keys, [prefix, -1])
+    last = first
+    while last < len(keys) and keys[last][0].startswith(prefix):
+        last += 1
+    return keys[first:last]
+
+
+def fuzzy_names(index: dict, word: str, max_distance: int = None) -> dict:
+    """Return the indexed names within an edit distance of a lower-case word.
+    Candidates must share at least a third of the word's trigrams.
+    :param index: search index
+    :param word: lower-case name as typed
+    :param max_distance: Optional. Largest distance; 1 for words up to 4 letters, else 2.
+    :return: dictionary of name: distance
+    """
+    if max_distance is None:
+        max_distance = 1 if len(word) <= 4 else 2
+    grams = trigrams(word)
+    shared = {}
+    for gram in grams:
+        for name in index['trigrams'].get(gram, []):
+            shared[name] = shared.get(name, 0) + 1
+    matches = {}
+    for name, count in shared.items():
+        if count * 3 >= len(grams) and abs(len(name) - len(word)) <= max_distance:
+            distance = edit_distance(word, name)
+            if distance <= max_distance:
+                matches[name] = distance
+    return matches
+
+
+def search_storms(index: dict, query: str, limit: int = 10) -> list:
+    """Search storms by a free-text query. Four-digit words filter on the year,
+    'AL', 'EP' or 'CP' on the basin, and the other words match names or ids
+    exactly, by prefix, or within a small edit distance.
+    :param index: search index from load_search_index
+    :param query: query like 'KATRINA 2005', 'katrna' or 'AL12'
+    :param limit: largest number of results
+    :return: list of storm dictionaries with 'id', 'name', 'year', 'basin' and
+     'score' (0 exact, 1 prefix, 1 + distance fuzzy), best first then newest first
+    """
+    year = None
+    basin = None
+    words = []
+    for word in query.split():
+        if re.match(r'^\d{4}$', word):
+            year = int(word)
+        elif word.upper() in BASINS:
+            basin = word.upper()
+        else:
+            words.append(word.lower())
+
+    scores = {}
+    if words:
+        for w, word in enumerate(words):
+            found = {}
+            for key, n in prefix_matches(index, word):
+                found[n] = 0 if key == word else 1
+            for name, distance in fuzzy_names(index, word).items():
+                for key, n in prefix_matches(index, name):
+                    if key == name:
+                        found[n] = min(found.get(n, 1 + distance), 1 + distance)
+            # every word must match; scores add up
+            scores = found if w == 0 else {n: scores[n] + found[n] for n in scores if n in found}
+    else:
+        scores = {n: 0 for n in range(len(index['storms']))}
+
+    results = []
+    for n, score in scores.items():
+        storm = index['storms'][n]
+        if (year is None or storm['year'] == year) and (basin is None or storm['basin'] == basin):
+            results.append(dict(storm, score=score))
+    results.sort(key=lambda s: (s['score'], -s['year'], s['id']))
+    return results[:limit]
+
+
+def resolve_storm_id(filename: str, query: str, cache: str = None) -> tuple:
+    """Turn what an analyst typed into a storm id: an exact id is returned as
+    it is, anything else goes through search_storms.
+    :param filename: path of a HURDAT2 file
+    :param query: storm id, name, or name and year
+    :param cache: Optional. Path of a JSON cache of the search index, see load_search_index.
+    :return: the best matching storm id, or the query itself if nothing matches,
+     and the list of the other matching storms from search_storms, best first
+    """
+    if ID_PATTERN.match(query.strip().upper()):
+        return query.strip().upper(), []
+    results = search_storms(load_search_index(filename, cache), query)
+    if not results:
+        return query, []
+    return results[0]['id'], results[1:]
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    index = load_search_index(filename)
+    while True:
+        query = input("Type a storm name, id or year, or nothing to quit: ")
+        if query == '':
+            break
+        for s in search_storms(index, query):
+            print(s['id'], s['name'], s['year'], s['basin'], 'score', s['score'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Optional SQLite persistence for HURDAT2 storms and fixes.
+
+A store is loaded once per HURDAT2 file in a single transaction and kept in
+WAL mode, so any number of processes can read it while it is being updated.
+Indexed queries replace the linear read_one_HURDAT2_storm(f, storm_id) scan
+and the per-year counters of PhaseB_5.
+"""
+
+import math
+import sqlite3
+import time
+from PhaseB_5 import read_one_HURDAT2_storm
+from hurdat_columns import HURRICANE_WIND, RADII_COLUMNS, fix_hours, format_position, parse_latitude, parse_longitude
+
+
+# fixes are bucketed into 1 degree cells numbered (lat + 90) * 360 + (lon + 180)
+BUCKET_DEGREES = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS storms (
+    id TEXT PRIMARY KEY, name TEXT, basin TEXT, year INTEGER,
+    num_rows INTEGER, max_wind INTEGER);
+CREATE TABLE IF NOT EXISTS fixes (
+    storm_id TEXT, seq INTEGER, date TEXT, time TEXT, hours REAL, record TEXT, status TEXT,
+    lat REAL, lon REAL, wind INTEGER, pressure INTEGER, {radii}, bucket INTEGER,
+    PRIMARY KEY (storm_id, seq));
+CREATE INDEX IF NOT EXISTS storms_year ON storms (year);
+CREATE INDEX IF NOT EXISTS fixes_status ON fixes (status);
+CREATE INDEX IF NOT EXISTS fixes_hours ON fixes (hours);
+CREATE INDEX IF NOT EXISTS fixes_bucket ON fixes (bucket);
+""".format(radii=', '.join('{} INTEGER'.format(name) for name in RADII_COLUMNS))
+
+FIX_FIELDS = ['storm_id', 'seq', 'date', 'time', 'hours', 'record', 'status', 'lat', 'lon',
+              'wind', 'pressure'] + RADII_COLUMNS + ['bucket']
+
+
+def spatial_bucket(lat: float, lon: float) -> int:
+    """Return the number of the 1 degree bucket holding a point, with longitude
+    180 kept in the last column so bucket ranges grow with longitude."""
+    columns = int(360 / BUCKET_DEGREES)
+    row = int(math.floor((lat + 90.0) / BUCKET_DEGREES))
+    col = min(int(math.floor((lon + 180.0) / BUCKET_DEGREES)), columns - 1)
+    return row * columns + col
+
+
+def open_store(filename: str, readonly: bool = False) -> sqlite3.Connection:
+    """Open a storm store, creating its tables if needed.
+    :param filename: path of the SQLite database
+    :param readonly: open without write access, for reader processes
+    :return: an open connection
+    """
+    if readonly:
+        return sqlite3.connect('file:{}?mode=ro'.format(filename), uri=True)
+    conn = sqlite3.connect(filename)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def storm_records(storm: dict) -> tuple:
+    """Given a HURDAT2 storm dictionary, return its storms row and its fixes rows."""
+    fixes = []
+    max_wind = -999
+    for seq, r in enumerate(storm['rows']):
+        lat = parse_latitude(r[4])
+        lon = parse_longitude(r[5])
+        radii = [r[8 + i] if len(r) > 8 + i else -999 for i in range(len(RADII_COLUMNS))]
+        fixes.append([storm['id'], seq, r[0], r[1], fix_hours(r[0], r[1]), r[2].strip(), r[3].strip(),
+                      lat, lon, r[6], r[7]] + radii + [spatial_bucket(lat, lon)])
+        max_wind = max(max_wind, r[6])
+    header = (storm['id'], storm['name'], storm['id'][:2], int(storm['id'][-4:]), storm['num_rows'], max_wind)
+    return header, fixes
+
+
+def load_HURDAT2(conn: sqlite3.Connection, filename: str) -> int:
+    """Load every storm of a HURDAT2 file into the store in one transaction,
+    replacing storms that are already there.
+    :param conn: connection from open_store
+    :param filename: path of a HURDAT2 file
+    :return: number of storms loaded
+    """
+    headers = []
+    fixes = []
+    with open(filename, 'r') as f:
+        while True:
+            s = read_one_HURDAT2_storm(f)
+            if s is None:
+                break  # hit end of file
+            header, rows = storm_records(s)
+            headers.append(header)
+            fixes.extend(rows)
+    with conn:
+        conn.executemany('DELETE FROM fixes WHERE storm_id = ?', [(h[0],) for h in headers])
+        conn.executemany('INSERT OR REPLACE INTO storms VALUES (?, ?, ?, ?, ?, ?)', headers)
+        conn.executemany('INSERT INTO fixes VALUES ({})'.format(', '.join('?' * len(FIX_FIELDS))), fixes)
+    return len(headers)
+
+
+def get_storm(conn: sqlite3.Connection, storm_id: str) -> dict:
+    """Return one storm from the store, in the same dictionary layout as
+    read_one_HURDAT2_storm.
+    :param conn: connection from open_store
+    :param storm_id: storm id like 'AL171988'
+    :return: a dictionary with the storm data or None if not found
+    """
+    header = conn.execute('SELECT id, name, num_rows FROM storms WHERE id = ?', (storm_id,)).fetchone()
+    if header is None:
+        return None
+    storm = {'id': header[0], 'name': header[1], 'num_rows': header[2], 'rows': []}
+    query = 'SELECT date, time, record, status, lat, lon, wind, pressure, {} FROM fixes ' \
+            'WHERE storm_id = ? ORDER BY seq'.format(', '.join(RADII_COLUMNS))
+    for r in conn.execute(query, (storm_id,)):
+        storm['rows'].append([r[0], r[1], r[2], r[3], format_position(r[4], 'N', 'S'),
+                              format_position(r[5], 'E', 'W')] + list(r[6:]))
+    return storm
+
+
+def storm_ids(conn: sqlite3.Connection, year: int = None, basin: str = None) -> list:
+    """Return the ids of the stored storms, in id order, optionally of one year and basin."""
+    query = 'SELECT id FROM storms WHERE (? IS NULL OR year = ?) AND (? IS NULL OR basin = ?) ORDER BY id'
+    return [r[0] for r in conn.execute(query, (year, year, basin, basin))]
+
+
+def storms_with_status(conn: sqlite3.Connection, status: str, start: float = None, end: float = None) -> list:
+    """Return the ids of the storms with a fix of a status, optionally within a time range.
+    :param conn: connection from open_store
+    :param status: system status like 'HU'
+    :param start: Optional. First time, in hours since the column epoch.
+    :param end: Optional. Last time, in hours since the column epoch.
+    :return: sorted list of storm ids
+    """
+    query = 'SELECT DISTINCT storm_id FROM fixes WHERE status = ? ' \
+            'AND (? IS NULL OR hours >= ?) AND (? IS NULL OR hours <= ?) ORDER BY storm_id'
+    return [r[0] for r in conn.execute(query, (status, start, start, end, end))]
+
+
+def storms_in_box(conn: sqlite3.Connection, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> list:
+    """Return the ids of the storms with a fix inside a lat/lon box, looking up
+    the buckets of each latitude row through the bucket index. A box with
+    lon_min > lon_max crosses the dateline and is queried as two ranges.
+    :return: sorted list of storm ids
+    """
+    if lon_min <= lon_max:
+        spans = [(lon_min, lon_max)]
+        lon_test = 'lon BETWEEN ? AND ?'
+    else:
+        spans = [(lon_min, 180.0), (-180.0, lon_max)]
+        lon_test = '(lon >= ? OR lon <= ?)'
+    ranges = []
+    for lat in range(int(math.floor(lat_min)), int(math.floor(lat_max)) + 1):
+        for west, east in spans:
+            ranges.append((spatial_bucket(lat, west), spatial_bucket(lat, east)))
+    where = ' OR '.join('bucket BETWEEN ? AND ?' for r in ranges)
+    query = 'SELECT DISTINCT storm_id FROM fixes WHERE ({}) AND lat BETWEEN ? AND ? AND {} ' \
+            'ORDER BY storm_id'.format(where, lon_test)
+    values = [b for r in ranges for b in r] + [lat_min, lat_max, lon_min, lon_max]
+    return [r[0] for r in conn.execute(query, values)]
+
+
+def year_counts(conn: sqlite3.Connection, basin: str = None) -> dict:
+    """Return the storm and hurricane counts of every year, keyed like the
+    year dictionary of PhaseB_5: {'1988': [storms, hurricanes]}.
+    :param conn: connection from open_store
+    :param basin: Optional. Only count storms of one basin, like 'AL'.
+    """
+    query = 'SELECT year, COUNT(*), SUM(max_wind >= ?) FROM storms ' \
+            'WHERE (? IS NULL OR basin = ?) GROUP BY year ORDER BY year'
+    return {str(r[0]): [r[1], r[2]] for r in conn.execute(query, (HURRICANE_WIND, basin, basin))}
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    conn = open_store('hurdat2.sqlite')
+    start = time.time()
+    count = load_HURDAT2(conn, filename)
+    print('loaded', count, 'storms in {:.2f} s'.format(time.time() - start))
+    for y, (storms, hurricanes) in year_counts(conn).items():
+        print('year', y, 'has', storms, 'storms and', hurricanes, 'hurricanes.')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Synthetic HURDAT2 ensemble generator for scale testing.
+
+A Markov model is fitted to the 6-hourly changes of wind, translation speed
+and heading in an existing archive, conditioned on the current intensity
+class. New storms start from observed genesis fixes and evolve by drawing
+observed (wind, speed, heading) change triples for their current class, so
+the changes keep their joint distribution. Files are written storm by storm
+in the HURDAT2 layout, with seasons generated in parallel worker processes.
+"""
+
+import calendar
+import random
+from hurdat_columns import HURRICANE_WIND, RADII_COLUMNS, format_position, read_HURDAT2_columns, storm_slices
+from masked_columns import mask_of
+from track_geometry import gc_destination, METERS_PER_NM
+from worker_pool import worker_map
+
+
+# upper bounds (exclusive) of the intensity classes of the Markov model, in knots
+INTENSITY_CLASSES = [34, 64, 96, 1000]
+
+STEP_HOURS = 6.0
+
+# (intercept, slope) of pressure against wind when the archive gives no usable fit
+FALLBACK_PRESSURE_LINE = (1036.0, -0.8)
+
+
+def intensity_class(wind: int) -> int:
+    """Return the Markov state of a wind speed."""
+    for c, bound in enumerate(INTENSITY_CLASSES):
+        if wind < bound:
+            return c
+    return len(INTENSITY_CLASSES) - 1
+
+
+def status_of(wind: int) -> str:
+    """Return the HURDAT2 system status matching a wind speed."""
+    if wind >= HURRICANE_WIND:
+        return 'HU'
+    if wind >= 34:
+        return 'TS'
+    return 'TD'
+
+
+def fit_markov_model(columns: dict) -> dict:
+    """Given a columnar dataset, fit the storm generator's model.
+    :param columns: columnar dataset with motion columns
+    :return: dictionary with 'basin', 'genesis' fixes, per-class 'changes'
+     and 'end' probabilities, 'radii' samples by wind and the 'pressure' fit
+    """
+    classes = len(INTENSITY_CLASSES)
+    model = {'basin': columns['basin'][0] if columns['basin'] else 'AL', 'genesis': [],
+             'changes': [[] for c in range(classes)], 'end': [0.0] * classes, 'radii': {}}
+    visits = [0] * classes
+    ends = [0] * classes
+    hours = columns['hours']
+    wind = columns['wind']
+    speed = columns['speed']
+    heading = columns['heading']
+    pressure = columns['pressure']
+    radii = [columns[name] for name in RADII_COLUMNS]
+    pressure_valid = mask_of(columns, 'pressure')
+    radii_valid = [all(known) for known in zip(*[mask_of(columns, name) for name in RADII_COLUMNS])]
+    pairs = []
+    for k, start, end in storm_slices(columns):
+        if wind[start] < 0:
+            continue
+        model['genesis'].append((columns['lat'][start], columns['lon'][start], wind[start],
+                                 speed[start], heading[start], int(columns['date'][start][4:6]),
+                                 int(columns['date'][start][6:8])))
+        last = start
+        for i in range(start + 1, end):
+            if hours[i] - hours[last] != STEP_HOURS:
+                continue  # only use changes between consecutive 6-hourly fixes
+            if wind[i] >= 0 and wind[last] >= 0:
+                state = intensity_class(wind[last])
+                visits[state] += 1
+                turn = (heading[i] - heading[last] + 180.0) % 360.0 - 180.0
+                model['changes'][state].append((wind[i] - wind[last], speed[i] - speed[last], turn))
+            last = i
+        if wind[last] >= 0:
+            ends[intensity_class(wind[last])] += 1
+        for i in range(start, end):
+            if wind[i] >= 0 and pressure_valid[i]:
+                pairs.append((wind[i], pressure[i]))
+            if radii_valid[i]:
+                model['radii'].setdefault(wind[i] // 5 * 5, []).append([r[i] for r in radii])
+    for c in range(classes):
+        model['end'][c] = ends[c] / (visits[c] + ends[c]) if visits[c] + ends[c] else 1.0
+
+    # least-squares line of pressure against wind, for the pressure column:
+    model['pressure'] = FALLBACK_PRESSURE_LINE
+    if pairs:
+        n = len(pairs)
+        mean_wind = sum(p[0] for p in pairs) / n
+        mean_pressure = sum(p[1] for p in pairs) / n
+        spread = sum((w - mean_wind) ** 2 for w, p in pairs)
+        if spread > 0:
+            slope = sum((w - mean_wind) * (p - mean_pressure) for w, p in pairs) / spread
+            model['pressure'] = (mean_pressure - slope * mean_wind, slope)
+    return model
+
+
+def generate_storm(model: dict, rng: random.Random, max_steps: int = 120) -> list:
+    """Given a fitted model, generate one storm's 6-hourly track.
+    :param model: model from fit_markov_model
+    :param rng: seeded random number generator
+    :param max_steps: longest allowed storm, in 6-hour steps
+    :return: list of (month, day, hour, lat, lon, wind) fixes, with day counted past month end
+    """
+    lat, lon, wind, speed, heading, month, day = rng.choice(model['genesis'])
+    hour = rng.choice([0, 6, 12, 18])
+    fixes = [(month, day, hour, lat, lon, wind)]
+    for step in range(max_steps):
+        state = intensity_class(wind)
+        if rng.random() < model['end'][state] or not model['changes'][state]:
+            break
+        d_wind, d_speed, turn = rng.choice(model['changes'][state])
+        wind = min(185, max(10, int(wind + d_wind)))
+        speed = min(60.0, max(0.0, speed + d_speed))
+        heading = (heading + turn) % 360.0
+        lat, lon = gc_destination(lat, lon, heading, speed * STEP_HOURS * METERS_PER_NM)
+        if abs(lat) > 70.0:
+            break
+        hour += 6
+        if hour == 24:
+            hour = 0
+            day += 1
+        fixes.append((month, day, hour, lat, lon, wind))
+    return fixes
+
+
+def format_storm(model: dict, rng: random.Random, storm_id: str, name: str, year: int, fixes: list) -> str:
+    """Given a generated track, return the storm as HURDAT2 text: a header
+    line and one 20-column row per fix.
+    :param model: model from fit_markov_model
+    :param rng: seeded random number generator, for the radii draws
+    :param storm_id: ATCF id like 'AL011851'
+    :param name: storm name
+    :param year: season year
+    :param fixes: fixes from generate_storm
+    :return: the storm's lines, joined
+    """
+    lines = ['{},{:>19},{:>7},\n'.format(storm_id, name, len(fixes))]
+    intercept, slope = model['pressure']
+    for month, day, hour, lat, lon, wind in fixes:
+        # carry days past the end of the month over into the next months:
+        while day > calendar.monthrange(year, month)[1]:
+            day -= calendar.monthrange(year, month)[1]
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+        samples = model['radii'].get(wind // 5 * 5)
+        radii = rng.choice(samples) if samples else [-999] * 12
+        row = '{:04d}{:02d}{:02d}, {:02d}00,  , {}, {:>5}, {:>6}, {:>3}, {:>4},'.format(
+            year, month, day, hour, status_of(wind), format_position(lat, 'N', 'S'),
+            format_position(lon, 'E', 'W'), wind, int(round(intercept + slope * wind)))
+        lines.append(row + ''.join(' {:>4},'.format(r) for r in radii) + '\n')
+    return ''.join(lines)
+
+
+_model = None
+
+
+def _init_worker(model: dict):
+    """Pool initializer: keep the model in each worker so tasks stay small."""
+    global _model
+    _model = model
+
+
+def generate_season(task) -> str:
+    """Pool worker: generate one season of storms as HURDAT2 text.
+    :param task: (year, storms in the season, seed)
+    :return: HURDAT2 text of the season
+    """
+    year, count, seed = task
+    rng = random.Random(seed)
+    text = []
+    for n in range(1, count + 1):
+        storm_id = '{}{:02d}{:04d}'.format(_model['basin'], n, year)
+        text.append(format_storm(_model, rng, storm_id, 'SYNTH{:02d}'.format(n), year, generate_storm(_model, rng)))
+    return ''.join(text)
+
+
+def write_synthetic_file(model: dict, filename: str, storms: int, storms_per_year: int = 25,
+                         first_year: int = 1000, seed: int = 590, processes: int = None):
+    """Write a synthetic HURDAT2 file. Seasons are generated in worker processes
+    and written in order as they arrive, so memory use stays at a few seasons
+    however large the file. Years count up from first_year; with at most 99
+    storms per season and no season past 9999 the ids stay valid ATCF ids.
+    :param model: model from fit_markov_model
+    :param filename: path of the file to write
+    :param storms: number of storms to generate
+    :param storms_per_year: storms per season, at most 99
+    :param first_year: year of the first season; the last season must not pass 9999
+    :param seed: random seed; season n uses seed + n
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    """
+    if not 1 <= storms_per_year <= 99:
+        raise ValueError('Invalid storms per year {} given.'.format(storms_per_year))
+    tasks = []
+    for n, first in enumerate(range(0, storms, storms_per_year)):
+        tasks.append((first_year + n, min(storms_per_year, storms - first), seed + n))
+    if not 0 <= first_year <= first_year + len(tasks) - 1 <= 9999:
+        raise ValueError('Invalid first year {} given for {} seasons.'.format(first_year, len(tasks)))
+    with open(filename, 'w') as f:
+        with worker_map(generate_season, tasks, processes, _init_worker, (model,), chunksize=4) as seasons:
+            for text in seasons:
+                f.write(text)
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    model = fit_markov_model(read_HURDAT2_columns(filename))
+    write_synthetic_file(model, 'synthetic-hurdat2.txt', 10000)
+    print('wrote 10000 synthetic storms to synthetic-hurdat2.txt')
+
+
+if __name__ == '__main__':
+    main()
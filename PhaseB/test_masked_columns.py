@@ -0,0 +1,33 @@
+"""
+Checks that the columnar quadrant rule picks the same quadrants as PhaseB_5
+for every fix of the NEPAC file.
+"""
+
+from PhaseB_5 import read_one_HURDAT2_storm, max_wind_quadrants
+from hurdat_columns import read_HURDAT2_columns, new_columns, append_row
+from masked_columns import quadrant_argmax
+
+
+FILENAME = 'hurdat2-nepac-1949-2016-041317.txt'
+
+
+def test_quadrant_argmax_matches_max_wind_quadrants():
+    columns = read_HURDAT2_columns(FILENAME)
+    rows = []
+    with open(FILENAME, 'r') as f:
+        while True:
+            storm = read_one_HURDAT2_storm(f)
+            if storm is None:
+                break  # hit end of file
+            rows.extend(storm['rows'])
+    assert len(rows) == len(columns['lat'])
+    for i, row in enumerate(rows):
+        assert quadrant_argmax(columns, i) == max_wind_quadrants(row)
+
+
+def test_quadrant_argmax_mixed_zero_and_unknown_tier():
+    row = ['20000101', '0000', ' ', 'TS', '10.0N', '100.0W', 40, 1000,
+           0, -999, 0, -999, 0, 0, 0, 0, 0, 0, 0, 0]
+    columns = new_columns()
+    append_row(columns, row)
+    assert quadrant_argmax(columns, 0) == max_wind_quadrants(row) == [0, 2]
@@ -0,0 +1,35 @@
+"""
+Checks of the storm store's box queries against a scan of the columns,
+for boxes that touch or cross the dateline.
+"""
+
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from storm_store import open_store, load_HURDAT2, storms_in_box
+
+
+FILENAME = 'hurdat2-nepac-1949-2016-041317.txt'
+
+
+def scanned_storms(columns: dict, lat_min: float, lat_max: float, inside) -> list:
+    """Return the ids of the storms with a fix in a latitude band whose longitude passes inside(lon)."""
+    found = set()
+    for k, start, end in storm_slices(columns):
+        for i in range(start, end):
+            if lat_min <= columns['lat'][i] <= lat_max and inside(columns['lon'][i]):
+                found.add(columns['id'][k])
+    return sorted(found)
+
+
+def test_storms_in_box_at_the_dateline():
+    columns = read_HURDAT2_columns(FILENAME)
+    conn = open_store(':memory:')
+    load_HURDAT2(conn, FILENAME)
+
+    touching = storms_in_box(conn, 10.0, 40.0, 170.0, 180.0)
+    assert touching
+    assert touching == scanned_storms(columns, 10.0, 40.0, lambda lon: 170.0 <= lon <= 180.0)
+
+    crossing = storms_in_box(conn, 10.0, 40.0, 175.0, -175.0)
+    assert crossing
+    assert crossing == scanned_storms(columns, 10.0, 40.0, lambda lon: lon >= 175.0 or lon <= -175.0)
+    conn.close()
@@ -0,0 +1,186 @@
+"""
+Group all storms of an archive into track regimes with mini-batch k-means
+over resampled track vectors, and summarize each regime with the usual
+per-storm metrics: landfalls, highest wind and translation speed.
+"""
+
+import random
+from hurdat_columns import MISSING, read_HURDAT2_columns, storm_slices
+from masked_columns import masked_max
+from analog_search import resample_track, track_features
+
+
+def _squared_distance(a: list, b: list) -> float:
+    """Return the squared euclidean distance between two vectors."""
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def _nearest_center(centers: list, vector: list) -> int:
+    """Return the index of the center nearest to a vector."""
+    best = 0
+    best_distance = None
+    for c, center in enumerate(centers):
+        d = _squared_distance(center, vector)
+        if best_distance is None or d < best_distance:
+            best = c
+            best_distance = d
+    return best
+
+
+def kmeans_plus_plus(vectors: list, k: int, rng: random.Random) -> list:
+    """Pick k initial centers, each new one with probability proportional to
+    its squared distance from the centers picked so far.
+    :param vectors: list of feature vectors
+    :param k: number of centers
+    :param rng: seeded random number generator
+    :return: list of k centers
+    """
+    centers = [list(vectors[rng.randrange(len(vectors))])]
+    distances = [_squared_distance(centers[0], v) for v in vectors]
+    while len(centers) < k:
+        total = sum(distances)
+        pick = rng.random() * total
+        chosen = len(vectors) - 1
+        for i, d in enumerate(distances):
+            pick -= d
+            if pick <= 0:
+                chosen = i
+                break
+        centers.append(list(vectors[chosen]))
+        distances = [min(d, _squared_distance(centers[-1], v)) for d, v in zip(distances, vectors)]
+    return centers
+
+
+def minibatch_kmeans(vectors: list, k: int, seed: int = 590, batch_size: int = 100, iterations: int = 100) -> tuple:
+    """Cluster vectors with mini-batch k-means: each iteration assigns a random
+    batch to its nearest centers and moves every center towards its batch
+    members with a per-center learning rate of 1 / (vectors seen so far).
+    The same seed always gives the same clusters.
+    :param vectors: list of feature vectors
+    :param k: number of clusters
+    :param seed: random seed
+    :param batch_size: vectors per iteration
+    :param iterations: number of mini-batch iterations
+    :return: list of centers, list of labels (one per vector)
+    """
+    rng = random.Random(seed)
+    centers = kmeans_plus_plus(vectors, k, rng)
+    seen = [0] * k
+    for iteration in range(iterations):
+        batch = [vectors[rng.randrange(len(vectors))] for b in range(batch_size)]
+        labels = [_nearest_center(centers, v) for v in batch]
+        for v, c in zip(batch, labels):
+            seen[c] += 1
+            rate = 1.0 / seen[c]
+            center = centers[c]
+            for d in range(len(center)):
+                center[d] += rate * (v[d] - center[d])
+    return centers, [_nearest_center(centers, v) for v in vectors]
+
+
+def merge_small_clusters(vectors: list, centers: list, labels: list, min_size: int) -> tuple:
+    """Dissolve the clusters with fewer than min_size members, which k-means++
+    tends to seed on outlying tracks, and move their members to the nearest
+    remaining center. The kept clusters are renumbered in their old order.
+    :param vectors: list of feature vectors
+    :param centers: list of centers
+    :param labels: cluster label of every vector
+    :param min_size: smallest cluster kept
+    :return: list of kept centers, list of labels (one per vector)
+    """
+    sizes = [labels.count(c) for c in range(len(centers))]
+    kept = [c for c in range(len(centers)) if sizes[c] >= min_size]
+    if len(kept) == len(centers) or not kept:
+        return centers, labels
+    renumber = {c: n for n, c in enumerate(kept)}
+    centers = [centers[c] for c in kept]
+    labels = [renumber[c] if c in renumber else _nearest_center(centers, v) for v, c in zip(vectors, labels)]
+    return centers, labels
+
+
+def storm_motion(columns: dict, start: int, end: int) -> tuple:
+    """Given one storm of a columnar dataset, return its mean and max speed
+    in knots, defined as in storm_speed of PhaseB_5, from the motion columns.
+    :param columns: columnar dataset
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :return: mean speed and max speed
+    """
+    time = columns['hours'][end - 1] - columns['hours'][start]
+    if time == 0:
+        return 0.0, 0.0
+    return columns['distance'][end - 1] / time, max(columns['speed'][start:end])
+
+
+def cluster_storms(columns: dict, k: int = 6, seed: int = 590, points: int = 16,
+                   batch_size: int = 100, iterations: int = 100, min_size: int = 5) -> dict:
+    """Given a columnar dataset, assign every storm to one of at most k track
+    regimes. Regimes of fewer than min_size storms are merged into their
+    nearest neighbours, so fewer than k may come back.
+    :param columns: columnar dataset
+    :param k: number of clusters
+    :param seed: random seed
+    :param points: number of resampled points per track
+    :param batch_size: vectors per mini-batch iteration
+    :param iterations: number of mini-batch iterations
+    :param min_size: smallest regime kept; 1 keeps every cluster
+    :return: dictionary with 'centers' and 'labels' (one label per storm)
+    """
+    vectors = [track_features(resample_track(columns, start, end, points))
+               for n, start, end in storm_slices(columns)]
+    centers, labels = minibatch_kmeans(vectors, k, seed, batch_size, iterations)
+    centers, labels = merge_small_clusters(vectors, centers, labels, min_size)
+    return {'centers': centers, 'labels': labels}
+
+
+def cluster_statistics(columns: dict, labels: list) -> dict:
+    """Given a columnar dataset and a cluster label per storm, return the
+    statistics of every cluster.
+    :param columns: columnar dataset
+    :param labels: cluster label of every storm
+    :return: dictionary of label: dictionary with 'storms', 'landfalls',
+     'max_wind', 'mean_max_wind', 'mean_speed' and 'max_speed'; the wind
+     statistics cover only storms with a known wind, and are -999 if none has one
+    """
+    stats = {}
+    known = {}
+    for k, start, end in storm_slices(columns):
+        label = labels[k]
+        if label not in stats:
+            stats[label] = {'storms': 0, 'landfalls': 0, 'max_wind': MISSING, 'mean_max_wind': 0.0,
+                            'mean_speed': 0.0, 'max_speed': 0.0}
+            known[label] = 0
+        s = stats[label]
+        mean_speed, max_speed = storm_motion(columns, start, end)
+        highest = masked_max(columns, 'wind', start, end)
+        s['storms'] += 1
+        s['landfalls'] += columns['record'][start:end].count('L')
+        if highest != MISSING:
+            known[label] += 1
+            s['max_wind'] = max(s['max_wind'], highest)
+            s['mean_max_wind'] += highest
+        s['mean_speed'] += mean_speed
+        s['max_speed'] = max(s['max_speed'], max_speed)
+    for label in stats:
+        stats[label]['mean_max_wind'] = stats[label]['mean_max_wind'] / known[label] if known[label] else MISSING
+        stats[label]['mean_speed'] /= stats[label]['storms']
+    return stats
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    clusters = cluster_storms(columns)
+    stats = cluster_statistics(columns, clusters['labels'])
+    for label in sorted(stats):
+        s = stats[label]
+        print('cluster', label, 'has', s['storms'], 'storms,', s['landfalls'], 'landfalls, highest wind',
+              s['max_wind'], 'mean speed {:.1f}, max speed {:.1f}'.format(s['mean_speed'], s['max_speed']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Gridded track-density and return-period climatology: how many storms, and how
+many at hurricane strength, passed within a given distance of each grid cell.
+"""
+
+import array
+from hurdat_columns import HURRICANE_WIND, read_HURDAT2_columns, storm_slices
+from track_geometry import METERS_PER_NM
+from track_interpolation import interpolate_tracks
+from latlon_grid import make_grid, new_layer, add_layer, write_grid
+from wind_swath import wind_field_cells
+from worker_pool import worker_map
+
+
+def storm_passages(dense: dict, start: int, end: int, grid: dict, radius_km: float) -> tuple:
+    """Given one storm of a densified columnar dataset, return the cells it
+    passed within `radius_km` of, at any strength and at hurricane strength.
+    :param dense: columnar dataset, ideally from interpolate_tracks
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param grid: grid description from make_grid
+    :param radius_km: passage distance in km
+    :return: set of cells passed, set of cells passed at hurricane strength
+    """
+    radius = [radius_km * 1000.0 / METERS_PER_NM] * 4
+    passed = set()
+    hurricane = set()
+    for i in range(start, end):
+        if dense['wind'][i] >= HURRICANE_WIND:
+            cells = set()
+            wind_field_cells(grid, dense['lat'][i], dense['lon'][i], radius, cells)
+            hurricane.update(cells)
+            passed.update(cells)
+        else:
+            wind_field_cells(grid, dense['lat'][i], dense['lon'][i], radius, passed)
+    return passed, hurricane
+
+
+def _partition_density(task):
+    """Pool worker: storm and hurricane passage counts of one partition."""
+    grid, partition, radius_km = task
+    storms = new_layer(grid)
+    hurricanes = new_layer(grid)
+    for k, start, end in storm_slices(partition):
+        passed, hurricane = storm_passages(partition, start, end, grid, radius_km)
+        for cell in passed:
+            storms[cell] += 1
+        for cell in hurricane:
+            hurricanes[cell] += 1
+    return storms, hurricanes
+
+
+def decade_partitions(dense: dict) -> list:
+    """Split a columnar dataset into one dataset per decade of storm years,
+    keeping only the columns the density needs.
+    :param dense: columnar dataset
+    :return: list of columnar datasets
+    """
+    decades = {}
+    for k, start, end in storm_slices(dense):
+        decade = dense['year'][k] // 10 * 10
+        if decade not in decades:
+            decades[decade] = {'offsets': [0], 'lat': [], 'lon': [], 'wind': []}
+        partition = decades[decade]
+        for name in ['lat', 'lon', 'wind']:
+            partition[name].extend(dense[name][start:end])
+        partition['offsets'].append(len(partition['lat']))
+    return [decades[d] for d in sorted(decades)]
+
+
+def return_periods(counts, years: int):
+    """Given passage counts per cell and the number of years they span, return
+    the empirical return period in years of each cell (0 where none passed)."""
+    periods = array.array('d', bytes(8 * len(counts)))
+    for i, count in enumerate(counts):
+        if count:
+            periods[i] = years / count
+    return periods
+
+
+def density_climatology(dense: dict, grid: dict, radius_km: float = 100.0, processes: int = None) -> dict:
+    """Given a densified columnar dataset, return its track-density climatology.
+    Each decade is computed as an independent partition, in a pool of worker
+    processes, and the partition layers are summed.
+    :param dense: columnar dataset, ideally from interpolate_tracks
+    :param grid: grid description from make_grid
+    :param radius_km: passage distance in km
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :return: dictionary of layers 'storms', 'hurricanes', 'storm_return_period' and 'hurricane_return_period'
+    """
+    tasks = [(grid, partition, radius_km) for partition in decade_partitions(dense)]
+    storms = new_layer(grid)
+    hurricanes = new_layer(grid)
+    with worker_map(_partition_density, tasks, processes, ordered=False) as results:
+        for partial_storms, partial_hurricanes in results:
+            add_layer(storms, partial_storms)
+            add_layer(hurricanes, partial_hurricanes)
+
+    years = max(dense['year']) - min(dense['year']) + 1 if dense['year'] else 0
+    return {'storms': storms, 'hurricanes': hurricanes,
+            'storm_return_period': return_periods(storms, years),
+            'hurricane_return_period': return_periods(hurricanes, years)}
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    grid = make_grid(0.0, 60.0, -180.0, -80.0, 0.5)
+    dense = interpolate_tracks(read_HURDAT2_columns(filename), 1.0)
+    layers = density_climatology(dense, grid, 100.0)
+    print('at most', max(layers['storms']), 'storms and', max(layers['hurricanes']),
+          'hurricanes passed within 100 km of one cell')
+    write_grid('track_density.grid', grid, layers)
+
+
+if __name__ == '__main__':
+    main()
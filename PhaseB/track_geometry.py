@@ -0,0 +1,99 @@
+"""
+Great-circle helpers on a spherical earth, working directly on float degrees.
+They agree with the ellipsoidalVincenty results used in PhaseB_5 to well under
+one percent, and avoid building a LatLon object for every fix when a whole
+archive is processed at once.
+"""
+
+import math
+
+
+EARTH_RADIUS = 6371008.8  # mean earth radius, in meters
+METERS_PER_NM = 1852.0
+KM_PER_DEGREE = 111.195  # length of a degree of latitude, or of longitude at the equator
+
+
+def gc_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Given two points in degrees, return the great-circle distance between them.
+    :return: distance in meters
+    """
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + \
+        math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def gc_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Given two points in degrees, return the initial bearing from the first
+    to the second, like LatLon.bearingTo. Identical points give 0.
+    :return: bearing in degrees clockwise from north, in [0, 360)
+    """
+    if lat1 == lat2 and lon1 == lon2:
+        return 0.0
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dl = math.radians(lon2 - lon1)
+    y = math.sin(dl) * math.cos(p2)
+    x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dl)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def gc_interpolate(lat1: float, lon1: float, lat2: float, lon2: float, fraction: float) -> tuple:
+    """Given two points in degrees, return the point a fraction of the way
+    along the great circle between them.
+    :param fraction: 0 gives the first point, 1 the second
+    :return: (lat, lon) in degrees
+    """
+    p1 = math.radians(lat1)
+    l1 = math.radians(lon1)
+    p2 = math.radians(lat2)
+    l2 = math.radians(lon2)
+    x1, y1, z1 = math.cos(p1) * math.cos(l1), math.cos(p1) * math.sin(l1), math.sin(p1)
+    x2, y2, z2 = math.cos(p2) * math.cos(l2), math.cos(p2) * math.sin(l2), math.sin(p2)
+    angle = math.acos(max(-1.0, min(1.0, x1 * x2 + y1 * y2 + z1 * z2)))
+    if angle < 1e-12:
+        return lat1, lon1
+    a = math.sin((1 - fraction) * angle) / math.sin(angle)
+    b = math.sin(fraction * angle) / math.sin(angle)
+    x = a * x1 + b * x2
+    y = a * y1 + b * y2
+    z = a * z1 + b * z2
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+
+def gc_destination(lat: float, lon: float, bearing: float, distance: float) -> tuple:
+    """Given a start point in degrees, a bearing and a distance, return the
+    destination point along the great circle.
+    :param bearing: degrees clockwise from north
+    :param distance: distance in meters
+    :return: (lat, lon) in degrees
+    """
+    p = math.radians(lat)
+    b = math.radians(bearing)
+    d = distance / EARTH_RADIUS
+    p2 = math.asin(math.sin(p) * math.cos(d) + math.cos(p) * math.sin(d) * math.cos(b))
+    l2 = math.radians(lon) + math.atan2(math.sin(b) * math.sin(d) * math.cos(p),
+                                        math.cos(d) - math.sin(p) * math.sin(p2))
+    return math.degrees(p2), (math.degrees(l2) + 540.0) % 360.0 - 180.0
+
+
+def gc_segment_distance(lat: float, lon: float, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Given a point and a great-circle segment in degrees, return the distance
+    from the point to the nearest point of the segment: the cross-track
+    distance when the point lies abreast of the segment, else the distance to
+    the nearer end.
+    :return: distance in meters
+    """
+    d13 = gc_distance(lat1, lon1, lat, lon) / EARTH_RADIUS
+    d12 = gc_distance(lat1, lon1, lat2, lon2) / EARTH_RADIUS
+    if d12 == 0.0:
+        return d13 * EARTH_RADIUS
+    turn = math.radians(gc_bearing(lat1, lon1, lat, lon) - gc_bearing(lat1, lon1, lat2, lon2))
+    if math.cos(turn) < 0:
+        return d13 * EARTH_RADIUS  # behind the start
+    cross = math.asin(max(-1.0, min(1.0, math.sin(d13) * math.sin(turn))))
+    along = math.acos(max(-1.0, min(1.0, math.cos(d13) / math.cos(cross))))
+    if along > d12:
+        return gc_distance(lat2, lon2, lat, lon)  # beyond the end
+    return abs(cross) * EARTH_RADIUS
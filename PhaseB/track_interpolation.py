@@ -0,0 +1,138 @@
+"""
+Resample every track of a columnar dataset onto a regular time grid.
+Positions follow the great circle between fixes; wind, pressure and the
+quadrant radii are interpolated linearly or with a monotone cubic spline.
+"""
+
+import math
+from hurdat_columns import RADII_COLUMNS, read_HURDAT2_columns, storm_slices
+from track_geometry import gc_interpolate
+
+
+# numeric fix columns carried over to the dense track
+VALUE_COLUMNS = ['wind', 'pressure'] + RADII_COLUMNS
+
+
+def pchip_slopes(hours: list, values: list, start: int, end: int) -> list:
+    """Given one storm's fix times and values, return the monotone cubic
+    (Fritsch-Carlson) slope at every fix. A slope is None where a fix or one
+    of its neighbours is missing (-999), and that piece falls back to linear.
+    :param hours: fix times in hours
+    :param values: fix values, -999 when missing
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :return: list of slopes, one per fix of the storm
+    """
+    n = end - start
+    deltas = []
+    for i in range(start, end - 1):
+        span = hours[i + 1] - hours[i]
+        if span <= 0 or values[i] < 0 or values[i + 1] < 0:
+            deltas.append(None)
+        else:
+            deltas.append((values[i + 1] - values[i]) / span)
+
+    slopes = [None] * n
+    for k in range(n):
+        before = deltas[k - 1] if k > 0 else None
+        after = deltas[k] if k < n - 1 else None
+        if before is None and after is None:
+            continue
+        if before is None or after is None:
+            slopes[k] = before if after is None else after
+        elif before * after <= 0:
+            slopes[k] = 0.0
+        else:
+            h0 = hours[start + k] - hours[start + k - 1]
+            h1 = hours[start + k + 1] - hours[start + k]
+            w1 = 2 * h1 + h0
+            w2 = h1 + 2 * h0
+            slopes[k] = (w1 + w2) / (w1 / before + w2 / after)
+    return slopes
+
+
+def _value_at(values: list, slopes, i: int, k: int, fraction: float, span: float):
+    """Return a value interpolated between fix i and i + 1 (fix k and k + 1 of
+    the storm), or -999 if either end is missing."""
+    y0 = values[i]
+    y1 = values[i + 1]
+    if y0 < 0 or y1 < 0:
+        return -999
+    if fraction == 0.0:
+        return y0
+    if slopes is None or slopes[k] is None or slopes[k + 1] is None:
+        return y0 + (y1 - y0) * fraction
+    f2 = fraction * fraction
+    f3 = f2 * fraction
+    return (2 * f3 - 3 * f2 + 1) * y0 + (f3 - 2 * f2 + fraction) * span * slopes[k] + \
+        (-2 * f3 + 3 * f2) * y1 + (f3 - f2) * span * slopes[k + 1]
+
+
+def interpolate_tracks(columns: dict, step: float = 1.0, method: str = 'linear') -> dict:
+    """Given a columnar dataset, return a new columnar dataset with every track
+    resampled every `step` hours. Grid times are multiples of `step`, so
+    synoptic fixes fall on the grid; a storm's grid runs from its first to its
+    last fix. Status is carried forward from the fix before each grid time.
+    :param columns: columnar dataset
+    :param step: grid spacing in hours
+    :param method: 'linear' or 'spline' for the numeric columns
+    :return: dense columnar dataset with 'hours', 'lat', 'lon', 'status' and VALUE_COLUMNS
+    """
+    if method not in ['linear', 'spline']:
+        raise ValueError('Invalid or unsupported interpolation method {} given.'.format(method))
+
+    dense = {'id': list(columns['id']), 'name': list(columns['name']),
+             'basin': list(columns['basin']), 'year': list(columns['year']), 'offsets': [0],
+             'hours': [], 'lat': [], 'lon': [], 'status': []}
+    for name in VALUE_COLUMNS:
+        dense[name] = []
+
+    hours = columns['hours']
+    lat = columns['lat']
+    lon = columns['lon']
+    for k, start, end in storm_slices(columns):
+        slopes = {}
+        if method == 'spline':
+            for name in VALUE_COLUMNS:
+                slopes[name] = pchip_slopes(hours, columns[name], start, end)
+
+        t = math.ceil(hours[start] / step) * step
+        i = start
+        while t <= hours[end - 1]:
+            # advance to the fix at or before t, skipping repeated times:
+            while i + 1 < end and hours[i + 1] <= t:
+                i += 1
+            if i + 1 < end:
+                span = hours[i + 1] - hours[i]
+                fraction = (t - hours[i]) / span
+                la, lo = gc_interpolate(lat[i], lon[i], lat[i + 1], lon[i + 1], fraction)
+                for name in VALUE_COLUMNS:
+                    dense[name].append(_value_at(columns[name], slopes.get(name), i, i - start, fraction, span))
+            else:
+                # t falls exactly on the last fix
+                la, lo = lat[i], lon[i]
+                for name in VALUE_COLUMNS:
+                    dense[name].append(columns[name][i])
+            dense['hours'].append(t)
+            dense['lat'].append(la)
+            dense['lon'].append(lo)
+            dense['status'].append(columns['status'][i])
+            t += step
+        dense['offsets'].append(len(dense['hours']))
+    return dense
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = read_HURDAT2_columns(filename)
+    dense = interpolate_tracks(columns, 1.0, 'spline')
+    print('resampled', len(columns['hours']), 'fixes of', len(columns['id']), 'storms into',
+          len(dense['hours']), 'hourly points')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Track simplification for maps and exports.
+
+Instead of simplifying each track again for every tolerance, every fix gets
+an importance once: the geodesic tolerance in meters up to which it survives
+Douglas-Peucker simplification (or, for Visvalingam-Whyatt, the effective
+triangle area in square kilometres at which it is removed). Simplifying to
+any tolerance is then a filter on that column. The level-of-detail pyramid
+stores the lowest web-map zoom showing each fix, so a tile at zoom z only
+fetches the fixes with min_zoom <= z.
+"""
+
+import heapq
+import math
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from track_geometry import gc_segment_distance, EARTH_RADIUS, KM_PER_DEGREE
+
+
+# a 256 pixel web-map tile spans the equator at zoom 0
+TILE_SIZE = 256
+MAX_ZOOM = 12
+
+# vertices are always kept at or above this importance: the ends of every track
+KEEP = float('inf')
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Return the size in meters of one pixel at the equator at a web-map zoom."""
+    return 2 * math.pi * EARTH_RADIUS / (TILE_SIZE * 2 ** zoom)
+
+
+def douglas_peucker_importance(lat: list, lon: list, start: int, end: int) -> list:
+    """Given one track, return the Douglas-Peucker importance of every fix: the
+    largest tolerance in meters at which the fix is still kept. Simplifying
+    with tolerance t keeps exactly the fixes with importance > t.
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param start: first row of the track
+    :param end: one past the last row of the track
+    :return: importance of rows start:end, KEEP for both ends
+    """
+    importance = [0.0] * (end - start)
+    if end - start == 0:
+        return importance
+    importance[0] = importance[-1] = KEEP
+    stack = [(start, end - 1, KEEP)]
+    while stack:
+        first, last, limit = stack.pop()
+        if last - first < 2:
+            continue
+        farthest = None
+        distance = -1.0
+        for i in range(first + 1, last):
+            d = gc_segment_distance(lat[i], lon[i], lat[first], lon[first], lat[last], lon[last])
+            if d > distance:
+                farthest = i
+                distance = d
+        # a fix cannot outlive the split that made it a segment end:
+        distance = min(distance, limit)
+        importance[farthest - start] = distance
+        stack.append((first, farthest, distance))
+        stack.append((farthest, last, distance))
+    return importance
+
+
+def _triangle_area(lat: list, lon: list, a: int, b: int, c: int) -> float:
+    """Return the area in square kilometres of a triangle of three fixes,
+    on an equirectangular projection around the middle one."""
+    scale = math.cos(math.radians(lat[b])) * KM_PER_DEGREE
+    ax = ((lon[a] - lon[b] + 180.0) % 360.0 - 180.0) * scale
+    cx = ((lon[c] - lon[b] + 180.0) % 360.0 - 180.0) * scale
+    ay = (lat[a] - lat[b]) * KM_PER_DEGREE
+    cy = (lat[c] - lat[b]) * KM_PER_DEGREE
+    return abs(ax * cy - cx * ay) / 2.0
+
+
+def visvalingam_importance(lat: list, lon: list, start: int, end: int) -> list:
+    """Given one track, return the Visvalingam-Whyatt importance of every fix:
+    the effective area in square kilometres at which it is removed, made
+    non-decreasing in removal order so a threshold gives a consistent track.
+    :param lat: latitudes in degrees
+    :param lon: longitudes in degrees
+    :param start: first row of the track
+    :param end: one past the last row of the track
+    :return: importance of rows start:end, KEEP for both ends
+    """
+    n = end - start
+    importance = [KEEP] * n
+    if n < 3:
+        return importance
+    previous = list(range(-1, n - 1))
+    following = list(range(1, n + 1))
+    heap = [(_triangle_area(lat, lon, start + i - 1, start + i, start + i + 1), i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+    current = [None] * n
+    for area, i in heap:
+        current[i] = area
+    removed = 0.0
+    while heap:
+        area, i = heapq.heappop(heap)
+        if importance[i] != KEEP or area != current[i]:
+            continue  # stale heap entry
+        removed = max(removed, area)
+        importance[i] = removed
+        p = previous[i]
+        f = following[i]
+        following[p] = f
+        previous[f] = p
+        for j in [p, f]:
+            if 0 < j < n - 1:
+                current[j] = _triangle_area(lat, lon, start + previous[j], start + j, start + following[j])
+                heapq.heappush(heap, (current[j], j))
+    return importance
+
+
+def min_zoom(importance: float) -> int:
+    """Return the lowest zoom at which a fix of a Douglas-Peucker importance is
+    drawn: the first zoom whose pixel is smaller than the importance."""
+    for zoom in range(MAX_ZOOM + 1):
+        if importance > zoom_tolerance(zoom):
+            return zoom
+    return MAX_ZOOM + 1
+
+
+def simplify_archive(columns: dict, method: str = 'dp') -> dict:
+    """Given a columnar dataset, add the 'importance' of every fix and, for
+    Douglas-Peucker, the 'min_zoom' level-of-detail column.
+    :param columns: columnar dataset, updated in place
+    :param method: 'dp' for Douglas-Peucker (meters) or 'vw' for Visvalingam-Whyatt (square km)
+    :return: the columnar dataset
+    """
+    if method == 'dp':
+        kernel = douglas_peucker_importance
+    elif method == 'vw':
+        kernel = visvalingam_importance
+    else:
+        raise ValueError('Invalid simplification method {} given.'.format(method))
+    importance = []
+    for k, start, end in storm_slices(columns):
+        importance.extend(kernel(columns['lat'], columns['lon'], start, end))
+    columns['importance'] = importance
+    if method == 'dp':
+        columns['min_zoom'] = bytearray(min_zoom(value) for value in importance)
+    else:
+        columns.pop('min_zoom', None)
+    return columns
+
+
+def simplified_rows(columns: dict, start: int, end: int, tolerance: float = None, zoom: int = None) -> list:
+    """Return the rows of one track kept at a tolerance, or at a zoom level
+    through the min_zoom pyramid.
+    :param columns: columnar dataset with simplify_archive columns
+    :param start: first row of the track
+    :param end: one past the last row of the track
+    :param tolerance: Optional. Tolerance in the units of the importance column.
+    :param zoom: Optional. Web-map zoom; needs the Douglas-Peucker pyramid.
+    :return: list of rows, in track order
+    """
+    if zoom is not None:
+        levels = columns['min_zoom']
+        return [i for i in range(start, end) if levels[i] <= zoom]
+    importance = columns['importance']
+    return [i for i in range(start, end) if importance[i] > (tolerance or 0.0)]
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    columns = simplify_archive(read_HURDAT2_columns(filename))
+    total = len(columns['hours'])
+    for zoom in range(MAX_ZOOM + 1):
+        kept = sum(1 for level in columns['min_zoom'] if level <= zoom)
+        print('zoom {:2d} (tolerance {:8.0f} m): {} of {} fixes'.format(zoom, zoom_tolerance(zoom), kept, total))
+
+
+if __name__ == '__main__':
+    main()
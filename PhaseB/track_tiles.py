@@ -0,0 +1,254 @@
+"""
+Pre-rendered web-map tiles of storm tracks.
+
+Tracks are cut into Web Mercator tiles per zoom level, using the
+level-of-detail pyramid of track_simplify so low zooms carry few vertices.
+Each tile holds one 'tracks' layer of line segments with intensity
+attributes, in tile coordinates of extent 4096 like Mapbox vector tiles,
+stored as gzipped JSON in an MBTiles-style SQLite file. The store remembers
+which storms touch each tile and a digest of every storm, so a rebuild only
+renders the tiles of storms that changed. Tiles are rendered in worker
+processes and written by the parent in one transaction.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import sqlite3
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from track_simplify import simplify_archive, simplified_rows
+from status_transitions import saffir_simpson
+from worker_pool import worker_map
+
+
+EXTENT = 4096
+MAX_ZOOM = 8
+MAX_LATITUDE = 85.05112878
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB,
+    PRIMARY KEY (zoom_level, tile_column, tile_row));
+CREATE TABLE IF NOT EXISTS tile_storms (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, storm_id TEXT);
+CREATE INDEX IF NOT EXISTS tile_storms_storm ON tile_storms (storm_id);
+CREATE INDEX IF NOT EXISTS tile_storms_tile ON tile_storms (zoom_level, tile_column, tile_row);
+CREATE TABLE IF NOT EXISTS storm_digests (storm_id TEXT PRIMARY KEY, digest TEXT);
+"""
+
+
+def mercator(lat: float, lon: float, zoom: int) -> tuple:
+    """Return the Web Mercator position of a point at a zoom, in tile units:
+    tile (x, y) covers [x, x + 1) by [y, y + 1), y counting down from the north."""
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.log(math.tan(math.radians(lat)) + 1.0 / math.cos(math.radians(lat))) / math.pi) / 2.0 * n
+    return x, y
+
+
+def track_segments(columns: dict, start: int, end: int, zoom: int) -> list:
+    """Return the segments of one track drawn at a zoom, as ((x0, y0), (x1, y1), row)
+    in tile units, with the second end unwrapped across the dateline."""
+    rows = simplified_rows(columns, start, end, zoom=zoom)
+    if len(rows) == 1:
+        rows = rows * 2  # a single fix is drawn as a point
+    lat = columns['lat']
+    lon = columns['lon']
+    segments = []
+    for a, b in zip(rows, rows[1:]):
+        lon_b = lon[a] + (lon[b] - lon[a] + 180.0) % 360.0 - 180.0
+        segments.append((mercator(lat[a], lon[a], zoom), mercator(lat[b], lon_b, zoom), a))
+    return segments
+
+
+def segment_tiles(p0: tuple, p1: tuple, zoom: int) -> list:
+    """Return the tiles (x, y) covered by the bounding box of a segment, with
+    x wrapped around the dateline, along with the unwrapped tile column."""
+    n = 2 ** zoom
+    tiles = []
+    for x in range(int(math.floor(min(p0[0], p1[0]))), int(math.floor(max(p0[0], p1[0]))) + 1):
+        for y in range(max(0, int(math.floor(min(p0[1], p1[1])))), min(n - 1, int(math.floor(max(p0[1], p1[1])))) + 1):
+            tiles.append((x % n, y, x))
+    return tiles
+
+
+def tile_segments(columns: dict, zooms, storms: list = None, wanted: set = None) -> dict:
+    """Given a columnar dataset with the min_zoom pyramid, cut tracks into the
+    tiles of the given zooms in one pass.
+    :param columns: columnar dataset
+    :param zooms: zoom levels to cut
+    :param storms: Optional. Indices of the storms to cut, ascending; every storm by default.
+    :param wanted: Optional. Set of (zoom, x, y) tiles to keep; every tile by default.
+    :return: dictionary of (zoom, x, y): list of (storm index, row, unwrapped tile column, p0, p1)
+    """
+    offsets = columns['offsets']
+    tiles = {}
+    for k in range(len(offsets) - 1) if storms is None else storms:
+        for zoom in zooms:
+            for p0, p1, row in track_segments(columns, offsets[k], offsets[k + 1], zoom):
+                for x, y, unwrapped in segment_tiles(p0, p1, zoom):
+                    if wanted is None or (zoom, x, y) in wanted:
+                        tiles.setdefault((zoom, x, y), []).append((k, row, unwrapped, p0, p1))
+    return tiles
+
+
+def storm_digest(columns: dict, start: int, end: int) -> str:
+    """Return a digest of the fixes of one track, to notice changed storms."""
+    fields = ['date', 'time', 'status', 'lat', 'lon', 'wind', 'pressure']
+    text = repr([columns[name][start:end] for name in fields])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def render_tile(columns: dict, tile: tuple, segments: list) -> bytes:
+    """Render one tile.
+    :param columns: columnar dataset
+    :param tile: (zoom, x, y)
+    :param segments: the tile's segments, from tile_segments
+    :return: gzipped JSON {'layer', 'extent', 'features'}, each feature a segment with
+     'id', 'name', 'status', 'wind', 'category' and 'coordinates' in tile units of EXTENT
+    """
+    zoom, x, y = tile
+    features = []
+    for k, row, unwrapped, p0, p1 in segments:
+        features.append({'id': columns['id'][k], 'name': columns['name'][k],
+                         'status': columns['status'][row], 'wind': columns['wind'][row],
+                         'category': saffir_simpson(columns['wind'][row]),
+                         'coordinates': [[int(round((p[0] - unwrapped) * EXTENT)),
+                                          int(round((p[1] - y) * EXTENT))] for p in [p0, p1]]})
+    data = {'layer': 'tracks', 'extent': EXTENT, 'features': features}
+    # a fixed mtime keeps the bytes of unchanged tiles identical between builds
+    return gzip.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), mtime=0)
+
+
+_columns = None
+
+
+def _init_worker(columns: dict):
+    """Pool initializer: keep the dataset in each worker so tasks stay small."""
+    global _columns
+    _columns = columns
+
+
+def _render_chunk(tasks: list) -> list:
+    """Pool worker: render a chunk of (tile, segments) tasks."""
+    return [(tile, render_tile(_columns, tile, segments)) for tile, segments in tasks]
+
+
+def open_tile_store(filename: str) -> sqlite3.Connection:
+    """Open an MBTiles-style tile store, creating its tables if needed."""
+    conn = sqlite3.connect(filename)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def build_tiles(conn: sqlite3.Connection, columns: dict, max_zoom: int = MAX_ZOOM,
+                processes: int = None, chunk_size: int = 200) -> int:
+    """Render the tiles of a columnar dataset into a tile store. Only the tiles
+    touched, before or after, by storms that are new, changed or gone since
+    the last build are rendered again, along with every tile of the zoom
+    levels above the last build's max zoom. Only those storms, and the other
+    storms the store lists in their tiles, are cut into tiles again. Zoom
+    levels above max_zoom are removed from the store.
+    :param conn: connection from open_tile_store
+    :param columns: columnar dataset
+    :param max_zoom: highest zoom level to render
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :param chunk_size: tiles per task
+    :return: number of tiles rendered
+    """
+    if 'min_zoom' not in columns:
+        simplify_archive(columns)
+    digests = {columns['id'][k]: storm_digest(columns, start, end) for k, start, end in storm_slices(columns)}
+    stored = dict(conn.execute('SELECT storm_id, digest FROM storm_digests'))
+    changed = set(i for i in digests if stored.get(i) != digests[i]) | (set(stored) - set(digests))
+    stored_zoom = conn.execute("SELECT value FROM metadata WHERE name = 'maxzoom'").fetchone()
+    stored_zoom = max_zoom if stored_zoom is None else int(stored_zoom[0])
+    if not changed and stored_zoom == max_zoom:
+        return 0
+
+    index = {storm_id: k for k, storm_id in enumerate(columns['id'])}
+    segments = tile_segments(columns, range(min(stored_zoom, max_zoom) + 1),
+                             sorted(index[i] for i in changed if i in index))
+    segments.update(tile_segments(columns, range(stored_zoom + 1, max_zoom + 1)))
+    dirty = set(segments)
+    for storm_id in changed:
+        for zoom, x, row in conn.execute('SELECT zoom_level, tile_column, tile_row FROM tile_storms '
+                                         'WHERE storm_id = ?', (storm_id,)):
+            dirty.add((zoom, x, 2 ** zoom - 1 - row))  # rows are stored bottom up, as in MBTiles
+    dirty = set(tile for tile in dirty if tile[0] <= max_zoom)
+
+    # unchanged storms drawn in the dirty tiles of the stored zoom levels are cut again, for those tiles only:
+    others = {}
+    for zoom, x, y in dirty:
+        if zoom <= stored_zoom:
+            for (storm_id,) in conn.execute('SELECT storm_id FROM tile_storms WHERE zoom_level = ? AND '
+                                            'tile_column = ? AND tile_row = ?', (zoom, x, 2 ** zoom - 1 - y)):
+                if storm_id not in changed:
+                    others.setdefault(index[storm_id], set()).add((zoom, x, y))
+    for k in sorted(others):
+        zooms = sorted(set(tile[0] for tile in others[k]))
+        for tile, found in tile_segments(columns, zooms, [k], others[k]).items():
+            segments.setdefault(tile, []).extend(found)
+    for tile in segments:
+        segments[tile].sort(key=lambda segment: segment[:2])  # storm and row order, as in a full build
+    coverage = {tile: set(s[0] for s in segments[tile]) for tile in segments}
+
+    tasks = [(tile, segments.get(tile, [])) for tile in sorted(dirty)]
+    chunks = [tasks[first:first + chunk_size] for first in range(0, len(tasks), chunk_size)]
+    with worker_map(_render_chunk, chunks, processes, _init_worker, (columns,), ordered=False) as results:
+        _write_tiles(conn, columns, results, coverage, changed, digests, stored_zoom, max_zoom)
+    return len(tasks)
+
+
+def _write_tiles(conn: sqlite3.Connection, columns: dict, results, coverage: dict, changed: set,
+                 digests: dict, stored_zoom: int, max_zoom: int):
+    """Write rendered tiles, their storms and the new storm digests in one
+    transaction, dropping the zoom levels above max_zoom."""
+    with conn:
+        if stored_zoom > max_zoom:
+            conn.execute('DELETE FROM tiles WHERE zoom_level > ?', (max_zoom,))
+            conn.execute('DELETE FROM tile_storms WHERE zoom_level > ?', (max_zoom,))
+        for chunk in results:
+            for (zoom, x, y), data in chunk:
+                row = 2 ** zoom - 1 - y
+                conn.execute('DELETE FROM tile_storms WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                             (zoom, x, row))
+                storms = coverage.get((zoom, x, y))
+                if not storms:
+                    conn.execute('DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                                 (zoom, x, row))
+                    continue
+                conn.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)', (zoom, x, row, data))
+                conn.executemany('INSERT INTO tile_storms VALUES (?, ?, ?, ?)',
+                                 [(zoom, x, row, columns['id'][k]) for k in sorted(storms)])
+        conn.executemany('DELETE FROM storm_digests WHERE storm_id = ?', [(i,) for i in changed if i not in digests])
+        conn.executemany('INSERT OR REPLACE INTO storm_digests VALUES (?, ?)',
+                         [(i, digests[i]) for i in changed if i in digests])
+        conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                         [('name', 'storm tracks'), ('format', 'json'), ('minzoom', '0'), ('maxzoom', str(max_zoom))])
+
+
+def read_tile(conn: sqlite3.Connection, zoom: int, x: int, y: int) -> dict:
+    """Return the decoded contents of a tile, or None if it is empty."""
+    found = conn.execute('SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                         (zoom, x, 2 ** zoom - 1 - y)).fetchone()
+    if found is None:
+        return None
+    return json.loads(gzip.decompress(found[0]).decode('utf-8'))
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    conn = open_tile_store('storm_tracks.mbtiles')
+    print('rendered', build_tiles(conn, read_HURDAT2_columns(filename)), 'tiles')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
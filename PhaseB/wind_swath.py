@@ -0,0 +1,216 @@
+"""
+Wind-swath footprints from the 34/50/64 kt quadrant radii (columns 8-19).
+Each fix gets an asymmetric wind field made of four quarter-discs, one per
+quadrant radius. Wind fields along a densified track are unioned on a lat/lon
+grid, and the archive raster counts how many storms put each cell inside
+their 34, 50 or 64 kt swath. The per-fix wind fields of a storm can also be
+written out as GeoJSON polygons.
+"""
+
+import json
+import math
+from hurdat_columns import read_HURDAT2_columns, storm_slices
+from track_geometry import KM_PER_DEGREE, METERS_PER_NM, gc_destination
+from track_interpolation import interpolate_tracks
+from latlon_grid import make_grid, new_layer, write_grid
+from worker_pool import worker_map
+
+
+# quadrant radii columns of each wind tier, in NE, SE, SW, NW order
+TIERS = {34: ['ne34', 'se34', 'sw34', 'nw34'],
+         50: ['ne50', 'se50', 'sw50', 'nw50'],
+         64: ['ne64', 'se64', 'sw64', 'nw64']}
+
+
+def wind_field_polygon(lat: float, lon: float, radii: list, points_per_quadrant: int = 6) -> list:
+    """Given a fix position and its four quadrant radii for one tier, return
+    the outline of the wind field: a quarter circle of the matching radius in
+    each of the NE, SE, SW and NW quadrants. Longitudes stay within 180
+    degrees of the fix, so a field across the antimeridian is not torn apart.
+    :param lat: latitude in degrees
+    :param lon: longitude in degrees
+    :param radii: [NE, SE, SW, NW] radii in nautical miles
+    :param points_per_quadrant: number of arc points per quadrant
+    :return: closed ring of (lat, lon) points
+    """
+    ring = []
+    for q in range(4):
+        radius = max(radii[q], 0) * METERS_PER_NM
+        for p in range(points_per_quadrant + 1):
+            bearing = q * 90.0 + 90.0 * p / points_per_quadrant
+            if radius == 0:
+                ring.append((lat, lon))
+            else:
+                p_lat, p_lon = gc_destination(lat, lon, bearing, radius)
+                ring.append((p_lat, lon + (p_lon - lon + 540.0) % 360.0 - 180.0))
+    ring.append(ring[0])
+    return ring
+
+
+def storm_wind_fields(columns: dict, start: int, end: int) -> list:
+    """Given one storm of a columnar dataset, return the wind-field polygons
+    of its fixes as GeoJSON features, one per fix and tier with radii.
+    :param columns: columnar dataset
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :return: list of GeoJSON Feature dictionaries
+    """
+    features = []
+    for tier in TIERS:
+        quadrants = [columns[name] for name in TIERS[tier]]
+        for i in range(start, end):
+            radii = [q[i] for q in quadrants]
+            if max(radii) <= 0:
+                continue
+            ring = wind_field_polygon(columns['lat'][i], columns['lon'][i], radii)
+            features.append({'type': 'Feature',
+                             'geometry': {'type': 'Polygon', 'coordinates': [[[lon, lat] for lat, lon in ring]]},
+                             'properties': {'date': columns['date'][i], 'time': columns['time'][i], 'tier': tier}})
+    return features
+
+
+def write_wind_fields(filename: str, columns: dict, storm_id: str) -> int:
+    """Write the wind-field polygons of one storm to a GeoJSON file.
+    :param filename: output file name
+    :param columns: columnar dataset, e.g. from read_HURDAT2_columns
+    :param storm_id: storm to write
+    :return: number of polygons written
+    """
+    k = columns['id'].index(storm_id)
+    features = storm_wind_fields(columns, columns['offsets'][k], columns['offsets'][k + 1])
+    collection = {'type': 'FeatureCollection', 'features': features,
+                  'properties': {'id': storm_id, 'name': columns['name'][k]}}
+    with open(filename, 'w') as out:
+        json.dump(collection, out)
+    return len(features)
+
+
+def wind_field_cells(grid: dict, lat: float, lon: float, radii: list, cells: set):
+    """Add to `cells` every grid cell whose centre lies inside the wind field
+    of one fix. Within a grid row the field is one run of columns, bounded by
+    the east and west quadrant radii for that side of the centre, so each row
+    costs one square root instead of a distance per cell.
+    :param grid: grid description from make_grid
+    :param lat: latitude in degrees
+    :param lon: longitude in degrees
+    :param radii: [NE, SE, SW, NW] radii in nautical miles
+    :param cells: set of cell numbers, updated in place
+    """
+    ne, se, sw, nw = [max(r, 0) * METERS_PER_NM / 1000.0 for r in radii]
+    reach = max(ne, se, sw, nw)
+    if reach == 0:
+        return
+    res = grid['resolution']
+    cols = grid['cols']
+    km_per_lon = KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+    r_low = max(0, int(math.ceil((lat - reach / KM_PER_DEGREE - grid['lat_min']) / res - 0.5)))
+    r_high = min(grid['rows'] - 1, int(math.floor((lat + reach / KM_PER_DEGREE - grid['lat_min']) / res - 0.5)))
+    for r in range(r_low, r_high + 1):
+        dy = (grid['lat_min'] + (r + 0.5) * res - lat) * KM_PER_DEGREE
+        east, west = (ne, nw) if dy >= 0 else (se, sw)
+        east = math.sqrt(east * east - dy * dy) / km_per_lon if east > abs(dy) else -1.0
+        west = math.sqrt(west * west - dy * dy) / km_per_lon if west > abs(dy) else -1.0
+        if east < 0 and west < 0:
+            continue
+        low = lon - max(west, 0.0)
+        high = lon + max(east, 0.0)
+        c_low = max(0, int(math.ceil((low - grid['lon_min']) / res - 0.5)))
+        c_high = min(cols - 1, int(math.floor((high - grid['lon_min']) / res - 0.5)))
+        if c_low <= c_high:
+            cells.update(range(r * cols + c_low, r * cols + c_high + 1))
+
+
+def storm_swath(dense: dict, start: int, end: int, grid: dict) -> dict:
+    """Given one storm of a densified columnar dataset, return its swaths.
+    :param dense: columnar dataset, ideally from interpolate_tracks
+    :param start: first row of the storm
+    :param end: one past the last row of the storm
+    :param grid: grid description from make_grid
+    :return: dictionary of tier: set of cell numbers inside the swath
+    """
+    swaths = {}
+    for tier in TIERS:
+        cells = set()
+        quadrants = [dense[name] for name in TIERS[tier]]
+        for i in range(start, end):
+            radii = [q[i] for q in quadrants]
+            if max(radii) > 0:
+                wind_field_cells(grid, dense['lat'][i], dense['lon'][i], radii, cells)
+        swaths[tier] = cells
+    return swaths
+
+
+def _swath_counts(task):
+    """Pool worker: count swath cells of a chunk of storms for every tier."""
+    grid, chunk = task
+    counts = {}
+    for tier in TIERS:
+        counts[tier] = {}
+    for k, start, end in storm_slices(chunk):
+        for tier, cells in storm_swath(chunk, start, end, grid).items():
+            tier_counts = counts[tier]
+            for cell in cells:
+                tier_counts[cell] = tier_counts.get(cell, 0) + 1
+    return counts
+
+
+def _chunks(dense: dict, size: int) -> list:
+    """Split a columnar dataset into datasets of at most `size` storms, keeping
+    only the columns the swath needs."""
+    names = ['lat', 'lon'] + [name for tier in TIERS for name in TIERS[tier]]
+    chunks = []
+    offsets = dense['offsets']
+    for first in range(0, len(offsets) - 1, size):
+        last = min(first + size, len(offsets) - 1)
+        low = offsets[first]
+        high = offsets[last]
+        chunk = {'offsets': [o - low for o in offsets[first:last + 1]]}
+        for name in names:
+            chunk[name] = dense[name][low:high]
+        chunks.append(chunk)
+    return chunks
+
+
+def swath_rasters(dense: dict, grid: dict, processes: int = None, chunk_size: int = 50) -> dict:
+    """Given a densified columnar dataset, return per-tier rasters counting how
+    many storms' swaths cover each grid cell. Storms are split into chunks
+    processed in a pool of worker processes and the counts summed.
+    :param dense: columnar dataset, ideally from interpolate_tracks
+    :param grid: grid description from make_grid
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :param chunk_size: number of storms per task
+    :return: dictionary of tier: array with one count per cell
+    """
+    tasks = [(grid, chunk) for chunk in _chunks(dense, chunk_size)]
+    rasters = {}
+    for tier in TIERS:
+        rasters[tier] = new_layer(grid)
+    with worker_map(_swath_counts, tasks, processes, ordered=False) as results:
+        for counts in results:
+            for tier in TIERS:
+                raster = rasters[tier]
+                for cell, count in counts[tier].items():
+                    raster[cell] += count
+    return rasters
+
+
+def main():
+    """Script main, to be executed as a demonstration."""
+
+    # filename = 'hurdat2-1851-2016-041117.txt'
+    filename = 'hurdat2-nepac-1949-2016-041317.txt'
+
+    grid = make_grid(0.0, 60.0, -180.0, -80.0, 0.25)
+    columns = read_HURDAT2_columns(filename)
+    storm_id = columns['id'][-1]
+    print('{}: {} wind-field polygons'.format(storm_id, write_wind_fields('wind_fields.json', columns, storm_id)))
+    dense = interpolate_tracks(columns, 1.0)
+    rasters = swath_rasters(dense, grid)
+    for tier in rasters:
+        print('{} kt swath: {} cells hit, at most {} storms per cell'.format(
+            tier, sum(1 for count in rasters[tier] if count), max(rasters[tier])))
+    write_grid('swaths.grid', grid, {'{}kt'.format(tier): rasters[tier] for tier in rasters})
+
+
+if __name__ == '__main__':
+    main()
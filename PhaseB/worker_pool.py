@@ -0,0 +1,41 @@
+"""
+Shared worker pool for the archive-wide batch jobs. A task list is mapped
+either inline or through a multiprocessing Pool, and the pool is always shut
+down when the caller is done with the results, even if consuming them raises.
+"""
+
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+
+@contextmanager
+def worker_map(function, tasks: list, processes: int = None, initializer=None, initargs: tuple = (),
+               ordered: bool = True, chunksize: int = 1):
+    """Map a function over tasks and yield an iterator over the results. With
+    one process, or at most one task, the map runs inline in this process,
+    after calling the initializer here; otherwise the tasks go to a pool of
+    worker processes that is terminated on leaving the block.
+    :param function: picklable function of one task
+    :param tasks: list of tasks
+    :param processes: Optional. Number of worker processes; None uses every core, 1 runs inline.
+    :param initializer: Optional. Function run once per worker before any task
+    :param initargs: arguments of the initializer
+    :param ordered: False to yield results as they complete rather than in task order
+    :param chunksize: number of tasks sent to a worker at a time
+    :return: iterator over the results, valid inside the with block
+    """
+    if processes == 1 or len(tasks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield map(function, tasks)
+        return
+
+    pool = Pool(processes, initializer=initializer, initargs=initargs)
+    try:
+        if ordered:
+            yield pool.imap(function, tasks, chunksize)
+        else:
+            yield pool.imap_unordered(function, tasks, chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
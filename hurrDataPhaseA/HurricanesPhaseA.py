@@ -107,12 +107,12 @@ def max_of_storm(cyclone):
     for storm in cyclone:
         max_storm[storm]= []
         max = 0
-        for wind in cyclone[storm]['Max']:
+        for i, wind in enumerate(cyclone[storm]['Max']):
             wind = int(wind)
             if wind > max:
                 max = wind
-                date = cyclone[storm]['Dates'][cyclone[storm]['Max'].index(str(wind))]
-                time = cyclone[storm]['Time'][cyclone[storm]['Max'].index(str(wind))]
+                date = cyclone[storm]['Dates'][i]
+                time = cyclone[storm]['Time'][i]
         max_storm[storm].append(max)
         max_storm[storm].append(datetime.strptime(date + time,'%Y%m%d%H%M'))
 